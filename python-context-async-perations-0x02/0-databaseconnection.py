@@ -1,6 +1,12 @@
+import logging
 import sqlite3
 from datetime import datetime
 
+from connection_pool import get_pool
+from sqlite_engine import get_engine
+
+logger = logging.getLogger("databaseconnection")
+
 
 class DatabaseConnection:
     """
@@ -36,9 +42,61 @@ class DatabaseConnection:
         return False
 
 
+class PooledDatabaseConnection:
+    """
+    DatabaseConnection backed by a bounded pool of warm connections.
+    - __enter__: checks a connection out of the pool and returns a cursor
+    - __exit__: COMMIT on success, ROLLBACK on error (as DatabaseConnection),
+      then returns the reset connection to the pool instead of closing it
+    Messages go to the "databaseconnection" logger: check-out/commit at
+    log_level (DEBUG by default), rollbacks at error_level.
+    readonly=True uses the WAL engine's read-only pool (sqlite_engine),
+    so readers run in parallel with each other and with a writer.
+    """
+
+    def __init__(self, db_name="users.db", pool=None, log_level=logging.DEBUG,
+                 error_level=logging.WARNING, readonly=False):
+        self.db_name = db_name
+        if pool is None:
+            pool = get_engine(db_name).readers if readonly else get_pool(db_name)
+        self.pool = pool
+        self.log_level = log_level
+        self.error_level = error_level
+        self.conn = None
+        self.cursor = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        self.cursor = self.conn.cursor()
+        logger.log(self.log_level, "Connection checked out for %s", self.db_name)
+        return self.cursor
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        conn, self.conn = self.conn, None
+        try:
+            if exc_type is None:
+                conn.commit()
+                logger.log(self.log_level, "Transaction committed.")
+            else:
+                conn.rollback()
+                logger.log(self.error_level, "Transaction rolled back. Error: %s", exc_val)
+        except BaseException:
+            self.pool.discard(conn)
+            raise
+        self.cursor.close()
+        self.pool.release(conn)
+        return False
+
+
 # ---- Example usage ----
 if __name__ == "__main__":
     with DatabaseConnection("users.db") as cursor:
         cursor.execute("SELECT * FROM users")
         results = cursor.fetchall()
         print("Users:", results)
+
+    logging.basicConfig(level=logging.DEBUG, format="[%(asctime)s] %(message)s",
+                        datefmt="%Y-%m-%d %H:%M:%S")
+    with PooledDatabaseConnection("users.db") as cursor:
+        cursor.execute("SELECT * FROM users")
+        print("Users (pooled):", cursor.fetchall())
@@ -1,8 +1,3 @@
-ChatGPT said:
-
-Here’s the full solution for Task 2: Reusable Query Context Manager ✅
-
-📄 2-execute_query.py
 import sqlite3
 from datetime import datetime
 
@@ -13,12 +8,27 @@ class ExecuteQuery:
     - Accepts query string and parameters.
     - Executes query inside __enter__ and returns results.
     - Closes connection automatically in __exit__.
+
+    Modes:
+    - default: __enter__ returns the full result list (fetchall)
+    - stream=True: __enter__ returns a lazy iterator that pulls rows in
+      fetchmany(arraysize) chunks; it is valid until __exit__, so only
+      one chunk is held in memory at a time
+    - many=True: params is a sequence of parameter sets; the statement
+      runs once per set via executemany in a single transaction and
+      __enter__ returns the number of rows affected
     """
 
-    def __init__(self, db_name, query, params=None):
+    def __init__(self, db_name, query, params=None, stream=False, arraysize=500,
+                 many=False):
+        if stream and many:
+            raise ValueError("stream and many can't be combined")
         self.db_name = db_name
         self.query = query
         self.params = params or ()
+        self.stream = stream
+        self.arraysize = arraysize
+        self.many = many
         self.conn = None
         self.cursor = None
         self.results = None
@@ -26,11 +36,30 @@ class ExecuteQuery:
     def __enter__(self):
         self.conn = sqlite3.connect(self.db_name)
         self.cursor = self.conn.cursor()
+        self.cursor.arraysize = self.arraysize
+        if self.many:
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Executing query: {self.query} "
+                  f"(bulk)")
+            self.cursor.executemany(self.query, self.params)
+            self.results = self.cursor.rowcount
+            return self.results
         print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Executing query: {self.query} {self.params}")
         self.cursor.execute(self.query, self.params)
-        self.results = self.cursor.fetchall()
+        if self.stream:
+            self.results = self._iter_rows(self.cursor)
+        else:
+            self.results = self.cursor.fetchall()
         return self.results
 
+    @staticmethod
+    def _iter_rows(cursor):
+        """Yield rows chunk by chunk; stops working once the context exits."""
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                return
+            yield from rows
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type is None:
             self.conn.commit()
@@ -38,6 +67,7 @@ class ExecuteQuery:
         else:
             self.conn.rollback()
             print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Transaction rolled back. Error: {exc_val}")
+        self.cursor.close()
         self.conn.close()
         print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Connection closed.")
         return False  # Propagate exceptions if any
@@ -49,3 +79,7 @@ if __name__ == "__main__":
     params = (25,)
     with ExecuteQuery("users.db", query, params) as results:
         print("Users older than 25:", results)
+
+    with ExecuteQuery("users.db", query, params, stream=True, arraysize=100) as rows:
+        for row in rows:
+            print(row)
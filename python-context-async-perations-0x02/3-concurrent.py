@@ -2,39 +2,149 @@ import asyncio
 import aiosqlite
 from datetime import datetime
 
+from async_pool import close_pools, get_pool
+from query_scheduler import INTERACTIVE, QueryScheduler
+from sqlite_engine import enable_wal, read_only_uri
+
 DB_PATH = "users.db"
+POOL_SIZE = 4
+CHUNK_SIZE = 500
+
+
+def read_pool():
+    """Pool of read-only (mode=ro) connections; the fetchers never write."""
+    return get_pool(read_only_uri(DB_PATH), size=POOL_SIZE, uri=True)
+
+
+_schedulers = {}
+
+
+def scheduler():
+    """QueryScheduler over read_pool() for the running loop."""
+    loop = asyncio.get_running_loop()
+    sched = _schedulers.get(loop)
+    if sched is None:
+        sched = _schedulers[loop] = QueryScheduler(
+            DB_PATH, max_concurrency=POOL_SIZE, pool=read_pool()
+        )
+    return sched
+
+
+async def _fetch_dicts(db, sql, params):
+    db.row_factory = aiosqlite.Row
+    async with db.execute(sql, params) as cursor:
+        return [dict(r) for r in await cursor.fetchall()]
+
+
+async def async_fetch_users(priority=INTERACTIVE, deadline=None):
+    """Fetch all users asynchronously (a scheduled read on the read-only pool)."""
+    rows = await scheduler().run(_fetch_dicts, "SELECT * FROM users", (),
+                                 priority=priority, write=False, deadline=deadline)
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Fetched all users: {len(rows)} rows")
+    return rows
+
 
+async def async_fetch_older_users(priority=INTERACTIVE, deadline=None):
+    """Fetch users older than 40 asynchronously (a scheduled read on the read-only pool)."""
+    rows = await scheduler().run(_fetch_dicts, "SELECT * FROM users WHERE age > ?", (40,),
+                                 priority=priority, write=False, deadline=deadline)
+    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Fetched users age > 40: {len(rows)} rows")
+    return rows
 
-async def async_fetch_users():
-    """Fetch all users asynchronously."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM users") as cursor:
-            rows = await cursor.fetchall()
-            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Fetched all users: {len(rows)} rows")
-            return [dict(r) for r in rows]
 
+_row_classes = {}
 
-async def async_fetch_older_users():
-    """Fetch users older than 40 asynchronously."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute("SELECT * FROM users WHERE age > 40") as cursor:
-            rows = await cursor.fetchall()
-            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Fetched users age > 40: {len(rows)} rows")
-            return [dict(r) for r in rows]
 
+def row_class(names):
+    """Lightweight __slots__ record class for the given column names (cached)."""
+    names = tuple(names)
+    cls = _row_classes.get(names)
+    if cls is None:
+        def __init__(self, row):
+            for name, value in zip(names, row):
+                setattr(self, name, value)
 
-async def fetch_concurrently():
-    """Run both queries concurrently."""
+        def __repr__(self):
+            fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in names)
+            return f"Row({fields})"
+
+        cls = _row_classes[names] = type("Row", (), {
+            "__slots__": names, "__init__": __init__, "__repr__": __repr__,
+        })
+    return cls
+
+
+async def async_stream(query, params=(), chunk_size=CHUNK_SIZE, row_type="tuple",
+                       chunks=False):
+    """
+    Yield a query's rows as they are fetched, chunk_size at a time, instead
+    of building the whole result (twice) in memory first.
+    - row_type: "tuple" (plain sqlite3 rows, no conversion), "slots"
+      (row_class objects, attribute access) or "dict"
+    - chunks=True yields each fetched list instead of single rows
+    The pooled connection is held until the generator finishes or is
+    closed; wrap early-exit consumers in contextlib.aclosing().
+    """
+    async with read_pool().connection() as db:
+        async with db.execute(query, params) as cursor:
+            names = [d[0] for d in cursor.description]
+            if row_type == "slots":
+                convert = row_class(names)
+            elif row_type == "dict":
+                def convert(row):
+                    return dict(zip(names, row))
+            elif row_type == "tuple":
+                convert = None
+            else:
+                raise ValueError(f"unknown row_type {row_type!r}")
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                if convert is not None:
+                    rows = [convert(r) for r in rows]
+                if chunks:
+                    yield rows
+                else:
+                    for row in rows:
+                        yield row
+
+
+def async_stream_users(**options):
+    """Stream all users (see async_stream for options)."""
+    return async_stream("SELECT * FROM users", **options)
+
+
+def async_stream_older_users(**options):
+    """Stream users older than 40 (see async_stream for options)."""
+    return async_stream("SELECT * FROM users WHERE age > ?", (40,), **options)
+
+
+async def fetch_concurrently(priority=INTERACTIVE, deadline=None):
+    """
+    Run both queries concurrently through the scheduler, which bounds how
+    many run at once; priority picks the lane and deadline (seconds) fails
+    a query with QueryTimeout if it hasn't finished by then.
+    """
     results = await asyncio.gather(
-        async_fetch_users(),
-        async_fetch_older_users()
+        async_fetch_users(priority=priority, deadline=deadline),
+        async_fetch_older_users(priority=priority, deadline=deadline)
     )
     return results
 
 
+async def main():
+    """fetch_concurrently, then close the pooled connections' threads."""
+    # readers don't block (or get blocked by) writers; off-loop, it may wait on a lock
+    await asyncio.get_running_loop().run_in_executor(None, enable_wal, DB_PATH)
+    try:
+        return await fetch_concurrently()
+    finally:
+        _schedulers.pop(asyncio.get_running_loop(), None)
+        await close_pools()
+
+
 if __name__ == "__main__":
-    all_users, older_users = asyncio.run(fetch_concurrently())
+    all_users, older_users = asyncio.run(main())
     print("All users:", all_users)
     print("Users > 40:", older_users)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Fixed-size pool of aiosqlite connections.
+
+Each aiosqlite connection runs its queries on its own worker thread, so
+opening one per query means one new thread per query. AsyncConnectionPool
+opens at most `size` connections (lazily) and keeps them, and their
+threads, for reuse.
+
+- fair: callers waiting for a connection are served strictly first come,
+  first served; a released connection is handed straight to the oldest
+  waiter, so newcomers can't jump the queue
+- timeout: acquire() raises PoolTimeout after waiting that long
+- release resets the connection: open transactions are rolled back and
+  row_factory is cleared
+- get_pool(db_path): one pool per database file and event loop;
+  close_pools() closes them (call it before the loop shuts down)
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+
+try:
+    import aiosqlite
+except ImportError:  # only needed once a pool actually connects
+    aiosqlite = None
+
+
+class PoolTimeout(Exception):
+    """No connection was released within the timeout."""
+
+
+class AsyncConnectionPool:
+    """asyncio pool of at most `size` aiosqlite connections."""
+
+    def __init__(
+        self,
+        db_path: str = "users.db",
+        size: int = 5,
+        timeout: Optional[float] = 10.0,
+        connect: Optional[Callable[..., Any]] = None,
+        **connect_kwargs: Any,
+    ) -> None:
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._connect = connect
+        self.connect_kwargs = connect_kwargs
+        self._idle: Deque[Any] = deque()
+        self._waiters: Deque["asyncio.Future[Any]"] = deque()
+        self._opened = 0
+        self._closed = False
+        self._stats = {"hits": 0, "opened": 0, "waits": 0, "timeouts": 0,
+                       "discarded": 0, "max_waiting": 0}
+
+    async def _open(self, reserved: bool = False) -> Any:
+        """Open a connection; reserved=True if its slot was counted already."""
+        if not reserved:
+            self._opened += 1  # reserve the slot before awaiting
+        try:
+            connect = self._connect
+            if connect is None:
+                if aiosqlite is None:
+                    raise RuntimeError("aiosqlite is required: pip install aiosqlite")
+                connect = aiosqlite.connect
+            conn = await connect(self.db_path, **self.connect_kwargs)
+        except BaseException:
+            self._opened -= 1
+            self._wake_next_opener()
+            raise
+        self._stats["opened"] += 1
+        return conn
+
+    def _wake_next_opener(self) -> None:
+        """
+        A slot freed up without a connection: reserve it for the oldest
+        waiter, which opens the connection, so no newcomer takes it first.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._opened += 1
+                waiter.set_result(None)
+                return
+
+    async def acquire(self, timeout: Optional[float] = None) -> Any:
+        """Check out a connection, waiting in FIFO order if all are busy."""
+        if self._closed:
+            raise RuntimeError("pool is closed")
+        if self._idle and not self._waiters:
+            self._stats["hits"] += 1
+            return self._idle.pop()
+        if self._opened < self.size and not self._waiters:
+            return await self._open()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._stats["waits"] += 1
+        self._stats["max_waiting"] = max(self._stats["max_waiting"], len(self._waiters))
+        wait = self.timeout if timeout is None else timeout
+        try:
+            conn = await asyncio.wait_for(asyncio.shield(waiter), wait)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self._stats["timeouts"] += 1
+            raise PoolTimeout(
+                f"no connection to {self.db_path} free after {wait:.1f}s "
+                f"({self.size} in use, {len(self._waiters)} waiting)"
+            ) from None
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        if conn is None:  # a slot was reserved: open a connection for this caller
+            return await self._open(reserved=True)
+        return conn
+
+    def _abandon(self, waiter: "asyncio.Future[Any]") -> None:
+        """Drop a waiter that gave up, passing on anything handed to it."""
+        if waiter.done() and not waiter.cancelled():
+            self._handback(waiter.result())  # handed over just too late
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _handback(self, conn: Any) -> None:
+        """Give conn to the oldest live waiter, or make it idle."""
+        if conn is None:  # a reserved slot: pass it on or free it
+            self._opened -= 1
+            self._wake_next_opener()
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(conn)
+                return
+        self._idle.append(conn)
+
+    async def release(self, conn: Any) -> None:
+        """Reset conn and pass it on; connections that fail the reset are closed."""
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            conn.row_factory = None
+        except Exception:
+            await self.discard(conn)
+            return
+        if self._closed:
+            await conn.close()
+            self._opened -= 1
+            return
+        self._handback(conn)
+
+    async def discard(self, conn: Any) -> None:
+        """Close conn and free its slot for a new connection."""
+        self._opened -= 1
+        self._stats["discarded"] += 1
+        try:
+            await conn.close()
+        finally:
+            self._wake_next_opener()
+
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """async with pool.connection() as db: ..."""
+        conn = await self.acquire(timeout)
+        try:
+            yield conn
+        except BaseException:
+            await self.release(conn)
+            raise
+        await self.release(conn)
+
+    async def close(self) -> None:
+        """Close idle connections; busy ones are closed when released."""
+        self._closed = True
+        while self._waiters:
+            self._waiters.popleft().cancel()
+        while self._idle:
+            conn = self._idle.pop()
+            self._opened -= 1
+            await conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot: Dict[str, Any] = dict(self._stats)
+        snapshot.update(open=self._opened, idle=len(self._idle), waiting=len(self._waiters))
+        return snapshot
+
+
+_pools: Dict[Tuple[Any, str], AsyncConnectionPool] = {}
+
+
+def get_pool(db_path: str = "users.db", **options: Any) -> AsyncConnectionPool:
+    """Pool for db_path on the running loop (options apply on first use)."""
+    key = (asyncio.get_running_loop(), db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = AsyncConnectionPool(db_path, **options)
+    return pool
+
+
+async def close_pools() -> None:
+    """Close every pool created on the running loop."""
+    loop = asyncio.get_running_loop()
+    for key in [k for k in _pools if k[0] is loop]:
+        await _pools.pop(key).close()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark throughput and tail latency of QueryScheduler vs concurrency.
+
+Usage: ./bench_query_scheduler.py [queries] [write_percent]
+
+Runs a mix of point reads, range reads and single-row UPDATEs against a
+throwaway users.db, first as the old unbounded asyncio.gather (one
+aiosqlite connection per query), then through QueryScheduler at several
+max_concurrency levels, printing queries/sec and p50/p99 latency.
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+from async_pool import AsyncConnectionPool
+from query_scheduler import QueryScheduler
+
+USERS = 10_000
+
+
+def build_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?)",
+        ((i, f"user {i}", f"user{i}@example.com", 18 + i % 80)
+         for i in range(1, USERS + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def workload(queries, write_percent, seed=42):
+    rng = random.Random(seed)
+    ops = []
+    for i in range(queries):
+        user_id = rng.randint(1, USERS)
+        if rng.random() < write_percent / 100.0:
+            ops.append(("UPDATE users SET email = ? WHERE id = ?",
+                        (f"u{i}@example.com", user_id), True))
+        elif i % 10 == 0:
+            ops.append(("SELECT * FROM users WHERE age BETWEEN ? AND ?",
+                        (user_id % 80, user_id % 80 + 2), False))
+        else:
+            ops.append(("SELECT * FROM users WHERE id = ?", (user_id,), False))
+    return ops
+
+
+def report(label, latencies, elapsed):
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000.0
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000.0
+    print(f"{label:>18}  {len(latencies) / elapsed:9.0f} q/s  "
+          f"p50 {p50:8.2f} ms  p99 {p99:8.2f} ms")
+
+
+async def unbounded(path, ops):
+    """The old pattern: gather everything, a connection per query."""
+    async def one(sql, params, write):
+        start = time.perf_counter()
+        async with aiosqlite.connect(path, timeout=30) as db:
+            async with db.execute(sql, params) as cursor:
+                await cursor.fetchall()
+            if write:
+                await db.commit()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(*op) for op in ops))
+    report("unbounded gather", list(latencies), time.perf_counter() - start)
+
+
+async def scheduled(path, ops, concurrency):
+    pool = AsyncConnectionPool(path, size=concurrency, timeout=60)
+    scheduler = QueryScheduler(max_concurrency=concurrency, pool=pool)
+
+    async def one(sql, params, write):
+        start = time.perf_counter()
+        if write:
+            await scheduler.execute(sql, params)
+        else:
+            await scheduler.fetchall(sql, params)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(*op) for op in ops))
+    report(f"concurrency {concurrency}", list(latencies), time.perf_counter() - start)
+    await pool.close()
+
+
+if __name__ == "__main__":
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    write_percent = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.db")
+        build_db(path)
+        ops = workload(queries, write_percent)
+        asyncio.run(unbounded(path, ops[:500]))
+        for concurrency in (1, 2, 4, 8, 16):
+            asyncio.run(scheduled(path, ops, concurrency))
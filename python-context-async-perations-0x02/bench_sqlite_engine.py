@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark mixed read/write throughput: rollback journal vs WAL engine.
+
+Usage: ./bench_sqlite_engine.py [readers] [seconds]
+
+Reader threads run point and small range lookups while one writer thread
+runs single-row UPDATE transactions, for a fixed time:
+1. rollback-journal mode, one read/write connection per thread
+2. SQLiteEngine: WAL, read-only pooled readers, one writer connection
+Prints reads/sec, writes/sec and how many operations hit "database is
+locked".
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from sqlite_engine import SQLiteEngine
+
+USERS = 10_000
+POINT = "SELECT * FROM users WHERE id = ?"
+RANGE = "SELECT * FROM users WHERE id BETWEEN ? AND ?"
+UPDATE = "UPDATE users SET email = ? WHERE id = ?"
+
+
+def build_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?)",
+        ((i, f"user {i}", f"user{i}@example.com", 18 + i % 80)
+         for i in range(1, USERS + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(label, read_once, write_once, readers, seconds):
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def loop(op, key, seed):
+        rng = random.Random(seed)
+        done = locked = 0
+        while not stop.is_set():
+            try:
+                op(rng)
+                done += 1
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+        with lock:
+            counts[key] += done
+            counts["locked"] += locked
+
+    threads = [threading.Thread(target=loop, args=(read_once, "reads", i))
+               for i in range(readers)]
+    threads.append(threading.Thread(target=loop, args=(write_once, "writes", -1)))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    print(f"{label:>16}  {counts['reads'] / seconds:10.0f} reads/s  "
+          f"{counts['writes'] / seconds:8.0f} writes/s  {counts['locked']:6} locked")
+
+
+def read_query(conn, rng):
+    user_id = rng.randint(1, USERS - 20)
+    if rng.random() < 0.1:
+        conn.execute(RANGE, (user_id, user_id + 20)).fetchall()
+    else:
+        conn.execute(POINT, (user_id,)).fetchone()
+
+
+def rollback_journal(path, readers, seconds):
+    local = threading.local()
+
+    def conn():
+        if not hasattr(local, "conn"):
+            local.conn = sqlite3.connect(path, timeout=0.1)
+        return local.conn
+
+    def read_once(rng):
+        read_query(conn(), rng)
+
+    def write_once(rng):
+        c = conn()
+        try:
+            c.execute(UPDATE, (f"u{rng.random()}@example.com", rng.randint(1, USERS)))
+            c.commit()
+        except sqlite3.OperationalError:
+            c.rollback()
+            raise
+
+    run("rollback journal", read_once, write_once, readers, seconds)
+
+
+def wal_engine(path, readers, seconds):
+    engine = SQLiteEngine(path, readers=readers, busy_timeout=0.1)
+
+    def read_once(rng):
+        with engine.read() as conn:
+            read_query(conn, rng)
+
+    def write_once(rng):
+        engine.execute(UPDATE, (f"u{rng.random()}@example.com", rng.randint(1, USERS)))
+
+    run("WAL engine", read_once, write_once, readers, seconds)
+    engine.close()
+
+
+if __name__ == "__main__":
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.db")
+        build_db(path)
+        rollback_journal(path, readers, seconds)
+        wal_engine(path, readers, seconds)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Bounded pool of warm sqlite3 connections for the context managers.
+
+- ConnectionPool: at most max_size connections per database file; acquire()
+  hands out the most recently returned one (warmest page cache) and waits
+  up to timeout for one to come back when all are checked out
+- release() resets a connection before it is reused: open transactions
+  are rolled back and row_factory / text_factory / trace callback are
+  restored; connections that fail the reset are closed and replaced
+- pragmas are applied once to each new connection
+- get_pool(db_name): process-wide pool per database file
+
+Connections are opened with check_same_thread=False because they move
+between threads; the pool guarantees one user at a time.
+
+Environment vars (optional): SQLITE_POOL_SIZE (default 5)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "5"))
+
+
+class PoolTimeout(Exception):
+    """No connection was returned to the pool within the timeout."""
+
+
+class ConnectionPool:
+    """Thread-safe bounded LIFO pool of sqlite3 connections."""
+
+    def __init__(
+        self,
+        db_name: str = "users.db",
+        max_size: int = POOL_SIZE,
+        timeout: float = 30.0,
+        pragmas: Optional[Dict[str, Any]] = None,
+        **connect_kwargs: Any,
+    ) -> None:
+        self.db_name = db_name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = pragmas or {}
+        self.connect_kwargs = dict(connect_kwargs, check_same_thread=False)
+        self._idle: Deque[sqlite3.Connection] = deque()
+        self._cond = threading.Condition()
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "timeouts": 0, "discarded": 0}
+
+    def acquire(self, timeout: Optional[float] = None) -> sqlite3.Connection:
+        """
+        Check a connection out, opening one if the pool isn't full yet.
+        Waiters are woken both by release() and by discard(), which frees
+        a slot for a new connection.
+        """
+        wait = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + wait
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    self._stats["hits"] += 1
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    self._stats["misses"] += 1
+                    break
+                if not waited:
+                    waited = True
+                    self._stats["waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"no connection to {self.db_name} free after {wait:.1f}s "
+                        f"({self.max_size} in use)"
+                    )
+        try:
+            return self._open()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_name, **self.connect_kwargs)
+        try:
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name}={value}")
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Reset conn and put it back; broken connections are dropped."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            conn.text_factory = str
+            conn.set_trace_callback(None)
+        except sqlite3.Error:
+            self.discard(conn)
+            return
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def discard(self, conn: sqlite3.Connection) -> None:
+        """Close conn and free its slot (a waiter may open a new one)."""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn in idle:
+            self.discard(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["size"] = self._size
+            snapshot["idle"] = len(self._idle)
+        return snapshot
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name: str = "users.db") -> ConnectionPool:
+    """Process-wide pool for db_name, created on first use."""
+    pool = _pools.get(db_name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(db_name, ConnectionPool(db_name))
+    return pool
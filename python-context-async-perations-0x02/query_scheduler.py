@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Bounded-concurrency scheduler for async SQLite queries.
+
+Instead of gathering every query at once, QueryScheduler admits at most
+max_concurrency of them, each on a connection from async_pool:
+
+- priority lanes: INTERACTIVE jobs are dispatched before BATCH ones; after
+  starvation_limit interactive dispatches in a row, a waiting batch job
+  gets a turn so batch work still progresses under load
+- read/write awareness: reads run in parallel, writes one at a time
+  (SQLite has a single writer; serializing them here avoids "database is
+  locked" retries). Within a lane reads may overtake a queued write, so
+  await the write before reading its result back.
+- deadlines: a job still queued at its deadline fails with QueryTimeout
+  without running; a running job is cancelled at the deadline (and the
+  connection's query interrupted where supported)
+- cancellation: cancelling the caller's await cancels the job, queued or
+  running
+- stats(): per-lane completed / failed / expired / cancelled counts and
+  p50 / p99 latency (queue wait included)
+"""
+
+import asyncio
+import inspect
+import itertools
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from async_pool import AsyncConnectionPool, get_pool
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+
+class QueryTimeout(Exception):
+    """A query missed its deadline (queued or running)."""
+
+
+class _Job:
+    __slots__ = ("seq", "fn", "args", "lane", "write", "deadline", "future",
+                 "queued_at", "task")
+
+    def __init__(self, seq: int, fn: Callable[..., Awaitable[Any]], args: tuple,
+                 lane: str, write: bool, deadline: Optional[float],
+                 future: "asyncio.Future[Any]", queued_at: float) -> None:
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+        self.lane = lane
+        self.write = write
+        self.deadline = deadline
+        self.future = future
+        self.queued_at = queued_at
+        self.task: Optional["asyncio.Task[Any]"] = None
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(p / 100.0 * len(sorted_values)))
+    return sorted_values[index]
+
+
+class QueryScheduler:
+    """
+    Admission control in front of an AsyncConnectionPool.
+
+    - max_concurrency: queries running at once (the pool should have at
+      least this many connections; the default pool is sized to match)
+    - serialize_writes: run write jobs one at a time
+    - starvation_limit: interactive dispatches before a waiting batch job
+      is let through
+    """
+
+    def __init__(
+        self,
+        db_path: str = "users.db",
+        max_concurrency: int = 4,
+        pool: Optional[AsyncConnectionPool] = None,
+        serialize_writes: bool = True,
+        starvation_limit: int = 8,
+        latency_samples: int = 10_000,
+    ) -> None:
+        self.db_path = db_path
+        self.max_concurrency = max_concurrency
+        self._pool = pool
+        self.serialize_writes = serialize_writes
+        self.starvation_limit = starvation_limit
+        self._queues: Dict[str, Dict[bool, Deque[_Job]]] = {
+            lane: {False: deque(), True: deque()} for lane in LANES
+        }
+        self._seq = itertools.count()
+        self._running = 0
+        self._writing = False
+        self._interactive_streak = 0
+        self._latencies: Dict[str, Deque[float]] = {
+            lane: deque(maxlen=latency_samples) for lane in LANES
+        }
+        self._counts: Dict[str, Dict[str, int]] = {
+            lane: {"completed": 0, "failed": 0, "expired": 0, "cancelled": 0}
+            for lane in LANES
+        }
+
+    @property
+    def pool(self) -> AsyncConnectionPool:
+        if self._pool is None:
+            self._pool = get_pool(self.db_path, size=self.max_concurrency)
+        return self._pool
+
+    async def run(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+        priority: str = INTERACTIVE,
+        write: bool = False,
+        deadline: Optional[float] = None,
+    ) -> Any:
+        """
+        Schedule `await fn(db, *args)` on a pooled connection and return
+        its result. deadline is in seconds from now.
+        """
+        if priority not in self._queues:
+            raise ValueError(f"unknown priority lane {priority!r}")
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        job = _Job(next(self._seq), fn, args, priority, write,
+                   None if deadline is None else now + deadline,
+                   loop.create_future(), now)
+        self._queues[priority][write].append(job)
+        timer = None
+        if job.deadline is not None:
+            timer = loop.call_at(job.deadline, self._expire_queued, job)
+        self._dispatch()
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            if job.task is not None:
+                job.task.cancel()
+            else:  # still queued; _dispatch skips it
+                job.future.cancel()
+                self._counts[job.lane]["cancelled"] += 1
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _expire_queued(self, job: _Job) -> None:
+        """Deadline timer: fail the job if it is still waiting to run."""
+        if job.task is None and not job.future.done():
+            self._counts[job.lane]["expired"] += 1
+            job.future.set_exception(QueryTimeout("deadline passed while queued"))
+
+    async def fetchall(self, sql: str, params: Any = (), **options: Any) -> List[Any]:
+        """Run a read query and return all its rows."""
+        return await self.run(_fetchall, sql, params, **options)
+
+    async def execute(self, sql: str, params: Any = (), **options: Any) -> int:
+        """Run a write statement, commit it and return the row count."""
+        options.setdefault("write", True)
+        return await self.run(_execute, sql, params, **options)
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pick the next runnable job by lane priority, FIFO within a lane."""
+        order = list(LANES)
+        if (self._interactive_streak >= self.starvation_limit
+                and self._has_runnable(BATCH)):
+            order.reverse()
+        for lane in order:
+            reads, writes = self._queues[lane][False], self._queues[lane][True]
+            can_write = bool(writes) and not (self.serialize_writes and self._writing)
+            if can_write and (not reads or writes[0].seq < reads[0].seq):
+                job = writes.popleft()
+            elif reads:
+                job = reads.popleft()
+            else:
+                continue
+            self._interactive_streak = (
+                self._interactive_streak + 1 if lane == INTERACTIVE else 0
+            )
+            return job
+        return None
+
+    def _has_runnable(self, lane: str) -> bool:
+        reads, writes = self._queues[lane][False], self._queues[lane][True]
+        return bool(reads) or (bool(writes) and not (self.serialize_writes and self._writing))
+
+    def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._running < self.max_concurrency:
+            job = self._next_job()
+            if job is None:
+                return
+            if job.future.done():  # cancelled or expired while queued
+                continue
+            self._running += 1
+            if job.write:
+                self._writing = True
+            job.task = loop.create_task(self._execute_job(job))
+
+    async def _execute_job(self, job: _Job) -> None:
+        loop = asyncio.get_running_loop()
+        counts = self._counts[job.lane]
+        try:
+            async with self.pool.connection() as db:
+                work = job.fn(db, *job.args)
+                if job.deadline is None:
+                    result = await work
+                else:
+                    try:
+                        result = await asyncio.wait_for(work, job.deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        await _interrupt(db)
+                        raise QueryTimeout("deadline passed while running") from None
+        except asyncio.CancelledError:
+            counts["cancelled"] += 1
+            if not job.future.done():
+                job.future.cancel()
+        except QueryTimeout as err:
+            counts["expired"] += 1
+            if not job.future.done():
+                job.future.set_exception(err)
+        except Exception as err:
+            counts["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(err)
+        else:
+            counts["completed"] += 1
+            self._latencies[job.lane].append(loop.time() - job.queued_at)
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._running -= 1
+            if job.write:
+                self._writing = False
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-lane counters and latency percentiles (seconds)."""
+        out: Dict[str, Any] = {"running": self._running}
+        for lane in LANES:
+            latencies = sorted(self._latencies[lane])
+            out[lane] = dict(
+                self._counts[lane],
+                queued=len(self._queues[lane][False]) + len(self._queues[lane][True]),
+                p50=_percentile(latencies, 50),
+                p99=_percentile(latencies, 99),
+            )
+        return out
+
+
+async def _fetchall(db: Any, sql: str, params: Any) -> List[Any]:
+    async with db.execute(sql, params) as cursor:
+        return await cursor.fetchall()
+
+
+async def _execute(db: Any, sql: str, params: Any) -> int:
+    async with db.execute(sql, params) as cursor:
+        count = cursor.rowcount
+    await db.commit()
+    return count
+
+
+async def _interrupt(db: Any) -> None:
+    """Abort the statement running on db, if the driver supports it."""
+    interrupt = getattr(db, "interrupt", None)
+    if interrupt is None:
+        return
+    try:
+        result = interrupt()
+        if inspect.isawaitable(result):
+            await result
+    except Exception:
+        pass  # best effort; the pool rolls back on release anyway
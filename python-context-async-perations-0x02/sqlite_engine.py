@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+SQLite engine: WAL, parallel read-only readers, one writer.
+
+In the default rollback-journal mode a writer locks readers out of the
+whole file (and readers hold off the writer). SQLiteEngine switches the
+database to WAL, where readers see the last committed snapshot while a
+writer appends to the log, and routes each access to the right connection:
+
+- reads: a ConnectionPool of read-only connections (URI mode=ro plus
+  PRAGMA query_only), so any number of threads read in parallel and a
+  stray write fails loudly instead of taking the write lock
+- writes: one writer connection behind a lock, in BEGIN IMMEDIATE
+  transactions; writers queue on the lock instead of spinning on
+  SQLITE_BUSY
+- other processes opening the same file get the same WAL behaviour (the
+  journal mode is stored in the database)
+
+- enable_wal(db_path): switch a database file to WAL once
+- read_only_uri(db_path): "file:...?mode=ro" URI for sqlite3/aiosqlite
+- get_engine(db_path): process-wide engine per database file
+"""
+
+import os
+import sqlite3
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from connection_pool import POOL_SIZE, ConnectionPool
+
+WRITER_PRAGMAS: Dict[str, Any] = {
+    "synchronous": "NORMAL",  # in WAL: durable at checkpoints, no fsync per commit
+    "cache_size": -16000,
+}
+READER_PRAGMAS: Dict[str, Any] = {
+    "query_only": 1,
+    "cache_size": -16000,
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+
+def read_only_uri(db_path: str) -> str:
+    """URI opening db_path read-only (pass uri=True to connect)."""
+    return "file:" + urllib.parse.quote(os.path.abspath(db_path)) + "?mode=ro"
+
+
+def enable_wal(db_path: str) -> str:
+    """Put db_path in WAL mode (persistent); returns the resulting mode."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class SQLiteEngine:
+    """
+    Read/write router for one database file.
+
+    - readers: size of the read-only connection pool
+    - busy_timeout: seconds a connection waits on a lock held elsewhere
+      (e.g. by another process's writer or a checkpoint)
+    """
+
+    def __init__(self, db_path: str = "users.db", readers: int = POOL_SIZE,
+                 busy_timeout: float = 30.0) -> None:
+        self.db_path = db_path
+        self.journal_mode = enable_wal(db_path)
+        self._writer = sqlite3.connect(
+            db_path, timeout=busy_timeout, check_same_thread=False,
+            isolation_level=None,  # transactions are explicit below
+        )
+        for name, value in WRITER_PRAGMAS.items():
+            self._writer.execute(f"PRAGMA {name}={value}")
+        self._write_lock = threading.Lock()
+        self.readers = ConnectionPool(
+            read_only_uri(db_path), max_size=readers, timeout=busy_timeout,
+            pragmas=READER_PRAGMAS, uri=True,
+        )
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Check out a read-only connection."""
+        conn = self.readers.acquire()
+        try:
+            yield conn
+        finally:
+            self.readers.release(conn)
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """
+        Hold the writer connection in a BEGIN IMMEDIATE transaction;
+        COMMIT on success, ROLLBACK on error (including a failed COMMIT,
+        which would otherwise leave the writer inside the transaction).
+        """
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def fetchall(self, sql: str, params: Any = ()) -> List[Any]:
+        with self.read() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def fetchone(self, sql: str, params: Any = ()) -> Optional[Any]:
+        with self.read() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def execute(self, sql: str, params: Any = ()) -> int:
+        """Run one write statement in its own transaction; returns rowcount."""
+        with self.write() as conn:
+            return conn.execute(sql, params).rowcount
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Any]) -> int:
+        """Run a statement over many parameter sets in one transaction."""
+        with self.write() as conn:
+            return conn.executemany(sql, seq_of_params).rowcount
+
+    def close(self) -> None:
+        self.readers.close()
+        with self._write_lock:
+            self._writer.close()
+
+
+_engines: Dict[str, SQLiteEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(db_path: str = "users.db") -> SQLiteEngine:
+    """Process-wide engine for db_path, created on first use."""
+    engine = _engines.get(db_path)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(db_path)
+            if engine is None:
+                engine = _engines[db_path] = SQLiteEngine(db_path)
+    return engine
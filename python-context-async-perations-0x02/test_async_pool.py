@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Unit tests for async_pool.AsyncConnectionPool.
+"""
+import asyncio
+import unittest
+
+from async_pool import AsyncConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Stand-in for an aiosqlite connection, counting the ones open."""
+
+    open_now = 0
+    most_open = 0
+
+    def __init__(self):
+        FakeConnection.open_now += 1
+        FakeConnection.most_open = max(FakeConnection.most_open,
+                                       FakeConnection.open_now)
+        self.in_transaction = False
+        self.row_factory = None
+
+    async def close(self):
+        FakeConnection.open_now -= 1
+
+
+async def fake_connect(db_path, **kwargs):
+    await asyncio.sleep(0)
+    return FakeConnection()
+
+
+class TestAsyncConnectionPool(unittest.IsolatedAsyncioTestCase):
+    """Slot accounting and FIFO hand-over of AsyncConnectionPool."""
+
+    def setUp(self):
+        FakeConnection.open_now = FakeConnection.most_open = 0
+        self.pool = AsyncConnectionPool("users.db", size=2, timeout=1.0,
+                                        connect=fake_connect)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_discard_reserves_slot_for_waiter(self):
+        """A newcomer can't take the slot discard() freed for a waiter."""
+        first = await self.pool.acquire()
+        await self.pool.acquire()
+        waiter = asyncio.ensure_future(self.pool.acquire())
+        await asyncio.sleep(0)
+        await self.pool.discard(first)
+        newcomer = asyncio.ensure_future(self.pool.acquire(timeout=0.1))
+        self.assertIsInstance(await waiter, FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            await newcomer
+        self.assertEqual(FakeConnection.most_open, 2)
+        self.assertEqual(self.pool.stats()["open"], 2)
+
+    async def test_release_hands_over_to_oldest_waiter(self):
+        """A released connection goes to the first caller that waited."""
+        conn = await self.pool.acquire()
+        await self.pool.acquire()
+        first = asyncio.ensure_future(self.pool.acquire())
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(self.pool.acquire(timeout=0.1))
+        await asyncio.sleep(0)
+        await self.pool.release(conn)
+        self.assertIs(await first, conn)
+        with self.assertRaises(PoolTimeout):
+            await second
+
+
+if __name__ == "__main__":
+    unittest.main()
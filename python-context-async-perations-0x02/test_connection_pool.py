@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Unit tests for connection_pool.ConnectionPool.
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from connection_pool import ConnectionPool, PoolTimeout
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Checkout, release and discard behaviour of ConnectionPool."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool = ConnectionPool(os.path.join(self.tmp.name, "users.db"),
+                                   max_size=1, timeout=1.0)
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmp.cleanup()
+
+    def test_release_reuses_connection(self):
+        """A released connection is handed out again."""
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+        self.assertIs(self.pool.acquire(), conn)
+
+    def test_timeout_when_exhausted(self):
+        """acquire() raises PoolTimeout when every slot stays in use."""
+        self.pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire(timeout=0.05)
+
+    def test_discard_wakes_waiter(self):
+        """Discarding a checked-out connection lets a waiter open a new one."""
+        held = self.pool.acquire()
+        result = {}
+
+        def waiter():
+            start = time.monotonic()
+            try:
+                result["conn"] = self.pool.acquire()
+            except PoolTimeout as err:
+                result["error"] = err
+            result["waited"] = time.monotonic() - start
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.1)
+        self.pool.discard(held)
+        thread.join()
+        self.assertNotIn("error", result)
+        self.assertLess(result["waited"], 0.5)
+        self.assertIsNot(result["conn"], held)
+        self.assertEqual(self.pool.stats()["size"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,52 @@
 import sqlite3
 import functools
-from datetime import datetime   # Added for timestamps
+import time
+
+from query_metrics import default_metrics, start_logging
+
+
+def log_queries(func=None, *, metrics=None):
+    """
+    Record every SQL query the wrapped function runs: per-fingerprint
+    calls, errors, row counts and a latency histogram (query_metrics).
+    Sampled calls are logged through the non-blocking "queries" logger;
+    read the numbers with metrics.export() or metrics.dump().
+    The query is taken from kwargs["query"] or the first positional arg.
+    """
+    if func is None:
+        return lambda f: log_queries(f, metrics=metrics)
 
-# Decorator to log SQL queries with timestamps
-def log_queries(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Extract query from kwargs or first positional arg
+        stats = metrics if metrics is not None else default_metrics
         query = kwargs.get("query") or (args[0] if args else None)
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        if query:
-            print(f"[{timestamp}] Executing SQL query: {query}")  # Log with time
-        else:
-            print(f"[{timestamp}] No SQL query provided.")
-        return func(*args, **kwargs)
+        if not query:
+            return func(*args, **kwargs)
+        if not stats.sampled():
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                stats.record(query, error=e)
+                raise
+            stats.record(query, rows=_row_count(result))
+            return result
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            stats.record(query, time.perf_counter() - start, error=e)
+            raise
+        stats.record(query, time.perf_counter() - start, _row_count(result))
+        return result
     return wrapper
 
 
+def _row_count(result):
+    """Rows in a fetchall() list, counted on every call, sampled or not."""
+    # fetchall() lists only; a fetchone() tuple is one row, not len() rows
+    return len(result) if isinstance(result, list) else None
+
+
 @log_queries
 def fetch_all_users(query):
     conn = sqlite3.connect('users.db')
@@ -28,5 +58,7 @@ def fetch_all_users(query):
 
 
 # Fetch users while logging the query
+start_logging()
 users = fetch_all_users(query="SELECT * FROM users")
 print(users)
+default_metrics.dump()
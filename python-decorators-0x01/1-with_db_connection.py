@@ -1,23 +1,7 @@
-import sqlite3
-import functools
-from datetime import datetime   # Optional for logging timestamps
+# Shared, pooled implementation (one reused connection per thread, pragmas
+# applied once); see db_connection.py
+from db_connection import with_db_connection
 
-# Decorator to automatically handle DB connection
-def with_db_connection(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Open connection before the function runs
-        conn = sqlite3.connect("users.db")
-        try:
-            # Pass the connection object to the decorated function
-            result = func(conn, *args, **kwargs)
-            return result
-        finally:
-            # Always close connection, even if error occurs
-            conn.close()
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[{timestamp}] Database connection closed.")
-    return wrapper
 
 @with_db_connection
 def get_user_by_id(conn, user_id):
@@ -1,34 +1,40 @@
-import sqlite3
 import functools
 from datetime import datetime  # optional: for simple timestamped logs
 
-# ---- Copied from Task 1 ----
-def with_db_connection(func):
-    """Open a SQLite connection, pass it as first arg (conn), and close it afterward."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Database connection closed.")
-    return wrapper
-# -----------------------------
+from result_cache import invalidate_all, track_writes
 
-def transactional(func):
+# ---- Shared with Task 1 (pooled connection) ----
+from db_connection import with_db_connection
+# -------------------------------------------------
+
+def transactional(func=None, *, batcher=None):
     """
     Ensure the wrapped DB operation runs inside a transaction.
     - COMMIT if the function succeeds
     - ROLLBACK if any exception is raised, then re-raise
+    - after COMMIT, drop cached query results for the tables written
+      (in every cache cache_query has used)
     Expects the first positional argument to be an open connection.
+
+    With @transactional(batcher=WriteBatcher(...)) calls are group
+    committed instead: the batcher supplies the connection, runs each
+    call in its own savepoint and returns once its batch has committed
+    (see write_batcher.py).
     """
+    if func is None:
+        return lambda f: transactional(f, batcher=batcher)
+    if batcher is not None:
+        return batcher.wrap(func)
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
         try:
-            result = func(conn, *args, **kwargs)
+            with track_writes(conn) as written:
+                result = func(conn, *args, **kwargs)
             conn.commit()
             print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Transaction committed.")
+            if written:
+                invalidate_all(written)
             return result
         except Exception as e:
             conn.rollback()
@@ -1,50 +1,91 @@
-ChatGPT said:
-
-Here’s Task 3 with retries fully implemented ✅
-
-📄 3-retry_on_failure.py
-import time
-import sqlite3
+import asyncio
 import functools
+import inspect
+import time
 from datetime import datetime
 
+from retry_policy import backoff_delay, default_budget, default_stats, is_retryable
 
-# ---- Copied from Task 1 (with_db_connection) ----
-def with_db_connection(func):
-    """Decorator to open/close SQLite connection and pass it to the function."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Database connection closed.")
-    return wrapper
+
+# ---- Shared with Task 1 (pooled connection) ----
+from db_connection import with_db_connection
 # -------------------------------------------------
 
 
-def retry_on_failure(retries=3, delay=2):
+def retry_on_failure(retries=3, delay=2, *, max_delay=30.0, retry_on=is_retryable,
+                     budget=default_budget, stats=default_stats):
     """
     Retry decorator for transient DB errors.
     - retries: number of attempts before giving up
-    - delay: seconds to wait between attempts
+    - delay: base backoff in seconds; retry n waits a random time in
+      [0, min(max_delay, delay * 2**(n-1))] (exponential, full jitter)
+    - retry_on: classifier; errors it rejects are raised immediately
+    - budget: shared RetryBudget; when exhausted, errors are raised
+      without retrying so retries can't pile load onto a failing database
+    - stats: RetryStats receiving attempts, retries and backoff time
+    Works on plain and async functions (async ones use asyncio.sleep).
     """
     def decorator(func):
+        def next_delay(attempt, err):
+            """Seconds to wait before the next attempt, or None to give up."""
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Attempt {attempt} failed: {err}")
+            if not retry_on(err):
+                stats.count("not_retryable")
+                return None
+            if attempt >= retries:
+                stats.count("gave_up")
+                print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] All {retries} attempts failed.")
+                return None
+            if budget is not None and not budget.withdraw():
+                stats.count("budget_exhausted")
+                print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Retry budget exhausted.")
+                return None
+            wait = backoff_delay(attempt, delay, max_delay)
+            stats.count("retries")
+            stats.count("backoff_seconds", wait)
+            print(f"Retrying in {wait:.2f} seconds...")
+            return wait
+
+        def started():
+            stats.count("calls")
+            if budget is not None:
+                budget.deposit()
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started()
+                for attempt in range(1, retries + 1):
+                    stats.count("attempts")
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        wait = next_delay(attempt, e)
+                        if wait is None:
+                            raise
+                        await asyncio.sleep(wait)
+                        continue
+                    if attempt > 1:
+                        stats.count("succeeded_after_retry")
+                    return result
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
+            started()
             for attempt in range(1, retries + 1):
+                stats.count("attempts")
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
-                    last_exception = e
-                    print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Attempt {attempt} failed: {e}")
-                    if attempt < retries:
-                        print(f"Retrying in {delay} seconds...")
-                        time.sleep(delay)
-            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] All {retries} attempts failed.")
-            raise last_exception
+                    wait = next_delay(attempt, e)
+                    if wait is None:
+                        raise
+                    time.sleep(wait)
+                    continue
+                if attempt > 1:
+                    stats.count("succeeded_after_retry")
+                return result
         return wrapper
     return decorator
 
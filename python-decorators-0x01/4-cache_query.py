@@ -1,45 +1,188 @@
 import time
+import asyncio
 import sqlite3
 import functools
+import threading
 from datetime import datetime
 
-# Global cache dictionary
-query_cache = {}
+try:
+    import aiosqlite
+except ImportError:  # async callers pass their own connections
+    aiosqlite = None
 
+from result_cache import (
+    default_cache, make_key, register_store, AsyncSingleFlight, SingleFlight,
+    FRESH, STALE
+)
 
-# ---- Copied from Task 1 (with_db_connection) ----
-def with_db_connection(func):
-    """Decorator to open/close SQLite connection and pass it to the function."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = sqlite3.connect("users.db")
-        try:
-            return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
-            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Database connection closed.")
-    return wrapper
+# Global cache: byte-bounded LRU with TTL, invalidated by transactional writes
+query_cache = default_cache
+
+
+# ---- Shared with Task 1 (pooled connection) ----
+from db_connection import with_db_connection
 # -------------------------------------------------
 
 
-def cache_query(func):
+# Running async refreshes; the event loop only keeps weak references
+_background_tasks = set()
+
+
+def _query_args(args, kwargs):
+    """Pull (query, params) from a (conn, query, params) style call."""
+    query = kwargs.get("query")
+    if not query and len(args) > 1:
+        query = args[1]  # handle positional query after conn
+    params = kwargs.get("params")
+    if params is None and len(args) > 2:
+        params = args[2]  # handle positional params after query
+    return query, params
+
+
+def _database_path(conn):
+    """File behind a sqlite3 connection, so a refresh can reopen it."""
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def _refresh_in_background(func, flights, store, key, ttl, args, kwargs):
     """
-    Cache query results based on the SQL query string.
-    - If the query result exists in cache, return it directly.
-    - Otherwise, execute the function and cache the result.
+    Re-run func in a daemon thread and store the fresh result.
+    The caller's connection is closed once it returns, so a sqlite3
+    connection argument is replaced by a new one to the same file.
     """
+    conn = args[0] if args and isinstance(args[0], sqlite3.Connection) else None
+    path = _database_path(conn) if conn is not None else None
+
+    def run():
+        def load():
+            if path is None:
+                return func(*args, **kwargs)
+            fresh_conn = sqlite3.connect(path)
+            try:
+                return func(fresh_conn, *args[1:], **kwargs)
+            finally:
+                fresh_conn.close()
+        try:
+            generation = store.generation()
+            result, _ = flights.do(key, load)
+            store.put(key, result, ttl=ttl, generation=generation)
+        except Exception as e:
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Background refresh failed: {e}")
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+async def _refresh_in_task(func, flights, store, key, ttl, args, kwargs):
+    """
+    Async counterpart of _refresh_in_background: re-run func in a task.
+    An aiosqlite connection argument is swapped for a new one to the
+    same file (read now, while the caller still holds it open).
+    """
+    conn = args[0] if args and aiosqlite is not None and isinstance(
+        args[0], aiosqlite.Connection) else None
+    path = None
+    if conn is not None:
+        async with conn.execute("PRAGMA database_list") as cursor:
+            path = (await cursor.fetchone())[2]
+
+    async def load():
+        generation = store.generation()
+        if path is None:
+            value = await func(*args, **kwargs)
+        else:
+            async with aiosqlite.connect(path) as fresh_conn:
+                value = await func(fresh_conn, *args[1:], **kwargs)
+        store.put(key, value, ttl=ttl, generation=generation)
+        return value
+
+    task = asyncio.ensure_future(flights.do(key, load))
+    _background_tasks.add(task)
+    task.add_done_callback(_refresh_done)
+
+
+def _refresh_done(task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Background refresh failed: {task.exception()}")
+
+
+def cache_query(func=None, *, cache=None, ttl=None, stale_while_revalidate=None):
+    """
+    Cache query results keyed on the normalized SQL and its parameters.
+    - If a fresh result is cached, return it directly.
+    - Otherwise, execute the function and cache the result. Concurrent
+      callers missing on the same key wait for that one execution
+      (single-flight) instead of all hitting the database.
+    - stale_while_revalidate=N: for N seconds after the TTL, return the
+      stale result at once and refresh it in the background.
+    Usable as @cache_query or @cache_query(cache=..., ttl=...), on plain
+    or async functions. Entries are dropped when transactional commits a
+    write to a table they read from.
+    """
+    if func is None:
+        return lambda f: cache_query(
+            f, cache=cache, ttl=ttl, stale_while_revalidate=stale_while_revalidate
+        )
+    # registered so transactional's commits invalidate custom caches too
+    store = register_store(cache if cache is not None else query_cache)
+    stale_for = stale_while_revalidate or 0.0
+    # Concurrent misses for the same key share one execution. Flights are
+    # per decorated function: keys only cover the SQL and its parameters,
+    # not the database or store the result belongs to.
+    flights = SingleFlight()
+    async_flights = AsyncSingleFlight()
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            query, params = _query_args(args, kwargs)
+            if not query:
+                return await func(*args, **kwargs)
+            key = make_key(query, params)
+            state, result = store.lookup(key, stale_for)
+            if state == FRESH:
+                return result
+            if state == STALE:
+                if not async_flights.in_flight(key):
+                    await _refresh_in_task(func, async_flights, store, key, ttl, args, kwargs)
+                return result
+
+            async def load():
+                generation = store.generation()
+                value = await func(*args, **kwargs)
+                store.put(key, value, ttl=ttl, generation=generation)
+                return value
+
+            result, _ = await async_flights.do(key, load)
+            return result
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        query = kwargs.get("query")
-        if not query and len(args) > 1:
-            query = args[1]  # handle positional query after conn
-        if query in query_cache:
+        query, params = _query_args(args, kwargs)
+        if not query:
+            return func(*args, **kwargs)
+        key = make_key(query, params)
+        state, result = store.lookup(key, stale_for)
+        if state == FRESH:
             print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Returning cached result for query: {query}")
-            return query_cache[query]
-        # Run the actual function
-        result = func(*args, **kwargs)
-        query_cache[query] = result
-        print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Query cached: {query}")
+            return result
+        if state == STALE:
+            if not flights.in_flight(key):
+                _refresh_in_background(func, flights, store, key, ttl, args, kwargs)
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Returning stale result for query: {query}")
+            return result
+
+        def load():
+            generation = store.generation()
+            # Run the actual function
+            value = func(*args, **kwargs)
+            store.put(key, value, ttl=ttl, generation=generation)
+            return value
+
+        result, shared = flights.do(key, load)
+        if not shared:
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Query cached: {query}")
         return result
     return wrapper
 
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the query-result cache.
+
+Usage: ./bench_cache_query.py [users] [lookups]
+
+Builds a throwaway SQLite users table, then:
+1. times the same SELECT uncached vs served from QueryCache
+2. runs skewed point lookups (SELECT ... WHERE id = ?) through caches of
+   several byte budgets and prints hit ratio, evictions and lookups/sec
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from result_cache import QueryCache, make_key
+
+
+def build_db(path: str, users: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?)",
+        ((i, f"user {i}", f"user{i}@example.com", 18 + i % 80)
+         for i in range(1, users + 1)),
+    )
+    conn.commit()
+    return conn
+
+
+def cached_fetch(cache: QueryCache, conn, query, params=()):
+    key = make_key(query, params)
+    hit, rows = cache.get(key)
+    if not hit:
+        rows = conn.execute(query, params).fetchall()
+        cache.put(key, rows)
+    return rows
+
+
+def timed(label: str, calls: int, func) -> None:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>32}  {calls / elapsed:12.0f} calls/s")
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_db(os.path.join(tmp, "users.db"), users)
+        query = "SELECT * FROM users WHERE age > 40"
+        cache = QueryCache()
+        timed("full scan, uncached", 50,
+              lambda: conn.execute(query).fetchall())
+        timed("full scan, cached", 50_000,
+              lambda: cached_fetch(cache, conn, query))
+
+        point = "SELECT * FROM users WHERE id = ?"
+        rng = random.Random(42)
+        ids = [min(int(rng.paretovariate(1.2)), users) for _ in range(lookups)]
+        for budget in (4 * 1024, 64 * 1024, 1024 * 1024):
+            cache = QueryCache(max_bytes=budget)
+            start = time.perf_counter()
+            for user_id in ids:
+                cached_fetch(cache, conn, point, (user_id,))
+            elapsed = time.perf_counter() - start
+            s = cache.stats()
+            print(f"budget {budget // 1024:>5} KiB  hit ratio {s['hit_ratio']:.3f}  "
+                  f"evictions {s['evictions']:>7}  {lookups / elapsed:10.0f} lookups/s")
+        conn.close()
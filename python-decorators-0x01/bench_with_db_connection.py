@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark calls/sec of with_db_connection: connect-per-call vs pooled.
+
+Usage: ./bench_with_db_connection.py [calls] [threads]
+
+Runs get_user_by_id-style point lookups against a throwaway users.db,
+first with the previous open/close-per-call decorator, then with the
+shared pooled decorator from db_connection.py (with sqlite3's prepared
+statement cache disabled, then enabled).
+"""
+
+import functools
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from db_connection import SQLitePool, with_db_connection
+
+
+def connect_per_call(db_path):
+    """The old decorator: sqlite3.connect + close around every call."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            conn = sqlite3.connect(db_path)
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return wrapper
+    return decorator
+
+
+def lookup(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+def run(label, func, calls, threads):
+    per_thread = calls // threads
+
+    def work():
+        for i in range(per_thread):
+            func(user_id=i % 1000 + 1)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>20}  {per_thread * threads / elapsed:10.0f} calls/s")
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)"
+        )
+        conn.executemany(
+            "INSERT INTO users VALUES (?, ?, ?, ?)",
+            ((i, f"user {i}", f"user{i}@example.com", 18 + i % 80)
+             for i in range(1, 1001)),
+        )
+        conn.commit()
+        conn.close()
+
+        run("connect per call", connect_per_call(path)(lookup), calls, threads)
+        pool = SQLitePool(path, statement_cache_size=0)
+        run("pooled, no stmt cache", with_db_connection(lookup, pool=pool),
+            calls, threads)
+        pool.close_all()
+        pool = SQLitePool(path)
+        run("pooled", with_db_connection(lookup, pool=pool), calls, threads)
+        stats = pool.statement_stats()
+        print(f"{stats['executions']} executions of {stats['distinct']} "
+              f"statement(s) on {stats['connections']} connection(s)")
+        pool.close_all()
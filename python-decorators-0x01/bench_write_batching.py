@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark updates/sec of group-committed writes against batch size.
+
+Usage: ./bench_write_batching.py [updates] [synchronous]
+
+Runs update_user_email-style UPDATEs against a throwaway users.db, first
+committing each call (as transactional does), then through WriteBatcher
+with growing max_batch. synchronous is the PRAGMA value (default FULL, so
+every COMMIT is an fsync).
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from db_connection import DEFAULT_PRAGMAS, SQLitePool
+from write_batcher import WriteBatcher
+
+USERS = 1000
+
+
+def update_email(conn, user_id, new_email):
+    conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+def per_call(pool, updates):
+    conn = pool.acquire()
+    try:
+        for i in range(updates):
+            update_email(conn, i % USERS + 1, f"u{i}@example.com")
+            conn.commit()
+    finally:
+        pool.release(conn)
+
+
+def batched(pool, updates, max_batch):
+    batcher = WriteBatcher(pool=pool, max_batch=max_batch, max_delay=0.01)
+    futures = [
+        batcher.submit(update_email, i % USERS + 1, f"u{i}@example.com")
+        for i in range(updates)
+    ]
+    for future in futures:
+        future.result()
+    batcher.close()
+    return batcher.stats()
+
+
+if __name__ == "__main__":
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    synchronous = sys.argv[2] if len(sys.argv) > 2 else "FULL"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)"
+        )
+        conn.executemany(
+            "INSERT INTO users VALUES (?, ?, ?, ?)",
+            ((i, f"user {i}", f"user{i}@example.com", 18 + i % 80)
+             for i in range(1, USERS + 1)),
+        )
+        conn.commit()
+        conn.close()
+        pool = SQLitePool(path, pragmas=dict(DEFAULT_PRAGMAS, synchronous=synchronous))
+
+        start = time.perf_counter()
+        per_call(pool, updates)
+        elapsed = time.perf_counter() - start
+        print(f"{'commit per call':>16}  {updates / elapsed:10.0f} updates/s")
+        for max_batch in (1, 10, 100, 1000):
+            start = time.perf_counter()
+            stats = batched(pool, updates, max_batch)
+            elapsed = time.perf_counter() - start
+            print(f"{'batch ' + str(max_batch):>16}  {updates / elapsed:10.0f} updates/s"
+                  f"  avg batch {stats['avg_batch']:.1f}")
+        pool.close_all()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite connection handling for the decorator tasks.
+
+- SQLitePool: one connection per thread, opened on first use with the
+  configured pragmas applied once, then reused for every later call
+- get_pool(db_path): process-wide pool per database file
+- with_db_connection: decorator passing a pooled connection as `conn`
+
+Pooled connections keep sqlite3's prepared-statement cache warm across
+calls: repeated SQL (e.g. SELECT * FROM users WHERE id = ?) is parsed once
+per connection and reused. The cache capacity is configurable and every
+execution is counted per statement (SQLitePool.statement_stats()); each
+connection tracks at most that many distinct statements, later ones are
+counted together under OTHER_STATEMENTS.
+Statements slower than the slow-query threshold are recorded, with their
+query plan and caller, in slow_queries.slow_query_log.
+
+Environment vars (optional): USERS_DB (database path, default users.db),
+SQLITE_STATEMENT_CACHE (prepared statements kept per connection)
+"""
+
+import functools
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+from slow_queries import SlowQueryLog, slow_query_log
+
+DB_PATH = os.environ.get("USERS_DB", "users.db")
+STATEMENT_CACHE_SIZE = int(os.environ.get("SQLITE_STATEMENT_CACHE", "256"))
+OTHER_STATEMENTS = "(other statements)"
+
+# Applied once per new connection. journal_mode=WAL is stored in the
+# database file; the others are per-connection settings.
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,  # negative = KiB, so ~16 MiB of page cache
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+
+class CountingCursor(sqlite3.Cursor):
+    """
+    Cursor that counts executions per SQL string on its connection and
+    times each statement (execute plus fetches) for the slow-query log.
+    """
+
+    _sql: Optional[str] = None
+    _params: Any = ()
+    _elapsed = 0.0
+    _slow: Optional[Dict[str, Any]] = None  # live slow-log entry
+
+    def execute(self, sql, parameters=()):
+        self.connection.count_statement(sql)
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._sql, self._params, self._elapsed, self._slow = sql, parameters, 0.0, None
+        self._timed(start)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection.count_statement(sql)
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._sql, self._params, self._elapsed, self._slow = sql, (), 0.0, None
+        self._timed(start)
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._timed(start)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._timed(start)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._timed(start)
+        return rows
+
+    def _timed(self, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        if self._slow is not None:
+            self._slow["seconds"] += elapsed
+            return
+        log = self.connection.slow_log
+        if log is None or self._sql is None:
+            return
+        self._elapsed += elapsed
+        if self._elapsed >= log.threshold:
+            self._slow = log.observe(self.connection, self._sql, self._params,
+                                     self._elapsed)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection handing out CountingCursors. The execute()
+    shortcuts are routed through them too (the C versions bypass cursor()).
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.statement_counts: Counter = Counter()
+        self.statement_limit = STATEMENT_CACHE_SIZE
+        self.slow_log: Optional[SlowQueryLog] = None
+
+    def count_statement(self, sql: str) -> None:
+        """Count one execution; past statement_limit keys, under OTHER_STATEMENTS."""
+        counts = self.statement_counts
+        if sql not in counts and len(counts) >= self.statement_limit:
+            sql = OTHER_STATEMENTS
+        counts[sql] += 1
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class SQLitePool:
+    """
+    Per-thread connection reuse for one database file.
+
+    sqlite3 connections belong to the thread that opened them, so each
+    thread gets its own, kept open between calls. release() rolls back
+    anything left uncommitted (as closing used to) once the outermost
+    user in that thread is done.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        pragmas: Optional[Dict[str, Any]] = None,
+        statement_cache_size: int = STATEMENT_CACHE_SIZE,
+        slow_log: Optional[SlowQueryLog] = slow_query_log,
+        **connect_kwargs: Any,
+    ) -> None:
+        self.db_path = db_path
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.statement_cache_size = statement_cache_size
+        self.slow_log = slow_log
+        self.connect_kwargs = connect_kwargs
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: Dict[int, sqlite3.Connection] = {}
+        self.opened = 0
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            factory=PooledConnection,
+            cached_statements=self.statement_cache_size,
+            **self.connect_kwargs,
+        )
+        conn.statement_limit = self.statement_cache_size
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        conn.slow_log = self.slow_log
+        with self._lock:
+            self._all[threading.get_ident()] = conn
+            self.opened += 1
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+            self._local.depth = 0
+        self._local.depth += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Hand the connection back; roll back leftovers at the outermost level."""
+        self._local.depth -= 1
+        if self._local.depth == 0 and conn.in_transaction:
+            conn.rollback()
+
+    def statement_stats(self) -> Dict[str, Any]:
+        """
+        Executions per SQL string summed over this pool's connections,
+        plus the cache capacity. While "distinct" stays within "capacity",
+        every execution after a statement's first on a connection reuses
+        the prepared statement instead of parsing it again; "untracked"
+        executions were of statements beyond a connection's first
+        "capacity" ones, so a non-zero count means the cache is too small.
+        """
+        with self._lock:
+            conns = list(self._all.values())
+        totals: Counter = Counter()
+        for conn in conns:
+            while True:
+                try:
+                    totals.update(dict(conn.statement_counts))
+                    break
+                except RuntimeError:
+                    continue  # counter grew in its own thread; copy again
+        return {
+            "capacity": self.statement_cache_size,
+            "connections": len(conns),
+            "distinct": len(totals) - (OTHER_STATEMENTS in totals),
+            "executions": sum(totals.values()),
+            "untracked": totals[OTHER_STATEMENTS],
+            "by_statement": dict(totals.most_common()),
+        }
+
+    def close_all(self) -> None:
+        """Close every connection (only safe once worker threads are done)."""
+        with self._lock:
+            conns = list(self._all.values())
+            self._all.clear()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass  # owned by another thread; it dies with that thread
+        self._local = threading.local()
+
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = DB_PATH) -> SQLitePool:
+    """Process-wide pool for db_path, created on first use."""
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(db_path, SQLitePool(db_path))
+    return pool
+
+
+def with_db_connection(
+    func: Optional[Callable[..., Any]] = None,
+    *,
+    db_path: Optional[str] = None,
+    pool: Optional[SQLitePool] = None,
+) -> Any:
+    """
+    Pass a pooled SQLite connection as the first argument (conn).
+    Usable as @with_db_connection or @with_db_connection(db_path=...).
+    Uncommitted changes are rolled back when the call returns, as they
+    were when the connection used to be closed.
+    """
+    if func is None:
+        return lambda f: with_db_connection(f, db_path=db_path, pool=pool)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        source = pool if pool is not None else get_pool(db_path or DB_PATH)
+        conn = source.acquire()
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            source.release(conn)
+    return wrapper
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Query instrumentation used by log_queries.
+
+- fingerprint(sql): the statement's shape, with literals replaced by '?'
+  and IN lists collapsed, so "WHERE id = 7" and "WHERE id = 8" aggregate
+- LatencyHistogram: HDR-style log-linear histogram in microseconds;
+  O(1) record, ~1.5% relative error, mergeable, percentiles on demand
+- QueryMetrics: per-fingerprint calls, errors, rows and latency
+  histogram; only a sample_rate fraction of calls is timed and logged
+  (calls and errors are always counted), so the hot path stays cheap
+- start_logging() / stop_logging(): route the "queries" logger through a
+  QueueHandler so emitting a record never blocks on I/O; a QueueListener
+  thread does the formatting-to-stream work
+- QueryMetrics.export() / dump(): p50/p90/p99 per SQL shape as dicts or a
+  printed table
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import threading
+from typing import Any, Dict, List, Optional, TextIO
+
+logger = logging.getLogger("queries")
+
+_LITERAL = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\b0x[0-9a-f]+\b|(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b",
+    re.IGNORECASE,
+)
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+SUB_BUCKET_BITS = 7
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_HALF = _SUB_BUCKETS >> 1
+
+
+def fingerprint(sql: str) -> str:
+    """Statement shape: literals -> '?', IN (...) lists -> IN (?...)."""
+    shape = _LITERAL.sub("?", sql.strip().rstrip(";"))
+    shape = _IN_LIST.sub("IN (?...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+def _bucket(value: int) -> int:
+    if value < _SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return _SUB_BUCKETS + (shift - 1) * _HALF + (value >> shift) - _HALF
+
+
+def _bucket_high(index: int) -> int:
+    """Largest value falling in bucket index."""
+    if index < _SUB_BUCKETS:
+        return index
+    shift = (index - _SUB_BUCKETS) // _HALF + 1
+    mantissa = (index - _SUB_BUCKETS) % _HALF + _HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of integer microsecond values (not thread-safe)."""
+
+    __slots__ = ("counts", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.max = 0
+
+    def record(self, micros: int) -> None:
+        index = _bucket(micros)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        if micros > self.max:
+            self.max = micros
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> int:
+        """Upper bound (microseconds) of the bucket holding the p-th percentile."""
+        if not self.total:
+            return 0
+        rank = max(1, round(p / 100.0 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_high(index), self.max)
+        return self.max
+
+
+class _Shape:
+    __slots__ = ("calls", "errors", "rows", "timed", "seconds", "histogram")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.timed = 0
+        self.seconds = 0.0
+        self.histogram = LatencyHistogram()
+
+
+class QueryMetrics:
+    """
+    Per-fingerprint query statistics.
+
+    - sample_rate: fraction of calls timed, added to the histogram and
+      logged (errors are always logged)
+    """
+
+    def __init__(self, sample_rate: float = 1.0) -> None:
+        self.sample_rate = sample_rate
+        self._shapes: Dict[str, _Shape] = {}
+        self._fingerprints: Dict[str, str] = {}  # raw SQL -> fingerprint
+        self._lock = threading.Lock()
+
+    def sampled(self) -> bool:
+        """Whether the next call should be timed."""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def fingerprint(self, sql: str) -> str:
+        """Memoized fingerprint(); the same SQL text is parsed once."""
+        fp = self._fingerprints.get(sql)
+        if fp is None:
+            fp = fingerprint(sql)
+            if len(self._fingerprints) < 10_000:
+                self._fingerprints[sql] = fp
+        return fp
+
+    def record(self, sql: str, seconds: Optional[float] = None,
+               rows: Optional[int] = None, error: Optional[BaseException] = None) -> None:
+        """Count one call; seconds is None for calls that were not sampled."""
+        fp = self.fingerprint(sql)
+        with self._lock:
+            shape = self._shapes.get(fp)
+            if shape is None:
+                shape = self._shapes[fp] = _Shape()
+            shape.calls += 1
+            if error is not None:
+                shape.errors += 1
+            if rows:
+                shape.rows += rows
+            if seconds is not None:
+                shape.timed += 1
+                shape.seconds += seconds
+                shape.histogram.record(int(seconds * 1_000_000))
+        if error is not None:
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning("query failed: %s (%s)", fp, error,
+                               extra={"fingerprint": fp, "error": repr(error)})
+        elif seconds is not None and logger.isEnabledFor(logging.INFO):
+            logger.info("query %.3f ms rows=%s: %s", seconds * 1000.0, rows, fp,
+                        extra={"fingerprint": fp, "duration": seconds, "rows": rows})
+
+    def export(self) -> List[Dict[str, Any]]:
+        """One dict per fingerprint, most total time first; times in ms."""
+        out = []
+        with self._lock:
+            for fp, shape in self._shapes.items():
+                hist, timed = shape.histogram, shape.timed
+                out.append({
+                    "fingerprint": fp,
+                    "calls": shape.calls,
+                    "errors": shape.errors,
+                    "rows": shape.rows,
+                    "sampled": timed,
+                    "mean_ms": shape.seconds / timed * 1000.0 if timed else 0.0,
+                    "p50_ms": hist.percentile(50) / 1000.0,
+                    "p90_ms": hist.percentile(90) / 1000.0,
+                    "p99_ms": hist.percentile(99) / 1000.0,
+                    "max_ms": hist.max / 1000.0,
+                    # sampled time scaled up to all calls
+                    "est_total_ms": (shape.seconds * shape.calls / timed * 1000.0
+                                     if timed else 0.0),
+                })
+        out.sort(key=lambda d: d["est_total_ms"], reverse=True)
+        return out
+
+    def dump(self, file: TextIO = sys.stdout, limit: int = 20) -> None:
+        """Print the export() table."""
+        print(f"{'calls':>8} {'err':>5} {'rows':>9} {'p50ms':>8} {'p99ms':>8} "
+              f"{'maxms':>8}  query", file=file)
+        for d in self.export()[:limit]:
+            print(f"{d['calls']:>8} {d['errors']:>5} {d['rows']:>9} "
+                  f"{d['p50_ms']:>8.3f} {d['p99_ms']:>8.3f} {d['max_ms']:>8.3f}  "
+                  f"{d['fingerprint']}", file=file)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+
+
+default_metrics = QueryMetrics()
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_atexit_registered = False
+
+
+def start_logging(handler: Optional[logging.Handler] = None,
+                  level: int = logging.INFO) -> None:
+    """
+    Send "queries" log records through a queue to handler (default:
+    stderr with "[YYYY-mm-dd HH:MM:SS] message"), written by a listener
+    thread. Calling it again replaces the previous setup. Queued records
+    are flushed at interpreter exit (or by stop_logging()).
+    """
+    global _listener, _queue_handler, _atexit_registered
+    stop_logging()
+    if not _atexit_registered:
+        atexit.register(stop_logging)
+        _atexit_registered = True
+    if handler is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(
+            logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S")
+        )
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(records)
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+    logger.addHandler(_queue_handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def stop_logging() -> None:
+    """Flush queued records and detach the queue handler."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+        _queue_handler = None
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Bounded query-result cache shared by the decorators.
+
+- QueryCache: LRU cache bounded by (approximate) bytes, with a TTL and
+  table-level invalidation; keys are (normalized SQL, params)
+- make_key(query, params): cache key for a query and its parameters
+- tables_read(sql) / tables_written(sql): table names a statement touches
+- track_writes(conn): records the tables written on a sqlite3 connection,
+  used by transactional to invalidate cached reads after COMMIT
+- SingleFlight / AsyncSingleFlight: concurrent callers for the same key
+  share one in-flight execution (threads / asyncio)
+- default_cache: process-wide cache used by cache_query and transactional
+  (shared_cache.SQLiteCacheStore when QUERY_CACHE_PATH is set)
+- register_store(store) / invalidate_all(tables): every store cache_query
+  uses is registered, so a committed write invalidates all of them
+"""
+
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import (
+    Any, Callable, Dict, FrozenSet, Iterable, Iterator, Optional, Set, Tuple
+)
+
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+[\"`\[]?(\w+)", re.IGNORECASE)
+_WRITE_TABLES = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?"
+    r"|DELETE\s+FROM)\s+[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+CacheKey = Tuple[str, Tuple[Any, ...]]
+
+# lookup() states
+FRESH, STALE, MISS = "fresh", "stale", "miss"
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside string literals and drop a trailing ';'."""
+    parts = _QUOTED.split(sql.strip().rstrip(";").strip())
+    # odd indexes are the quoted literals captured by split()
+    return "".join(
+        p if i % 2 else re.sub(r"\s+", " ", p) for i, p in enumerate(parts)
+    )
+
+
+def _freeze(params: Any) -> Tuple[Any, ...]:
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(params)
+    return (params,)
+
+
+def make_key(query: str, params: Any = None) -> CacheKey:
+    """Cache key: normalized SQL plus the bound parameters."""
+    return normalize_sql(query), _freeze(params)
+
+
+def tables_read(sql: str) -> FrozenSet[str]:
+    """Lower-cased names of the tables a query reads from."""
+    return frozenset(t.lower() for t in _READ_TABLES.findall(_QUOTED.sub("''", sql)))
+
+
+def tables_written(sql: str) -> FrozenSet[str]:
+    """Lower-cased names of the tables a statement writes to."""
+    return frozenset(t.lower() for t in _WRITE_TABLES.findall(_QUOTED.sub("''", sql)))
+
+
+def estimate_size(value: Any) -> int:
+    """Rough byte size of a result (list of row tuples and their values)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for row in value:
+            size += sys.getsizeof(row)
+            if isinstance(row, (list, tuple)):
+                size += sum(sys.getsizeof(v) for v in row)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires", "tables")
+
+    def __init__(self, value: Any, size: int, expires: float,
+                 tables: FrozenSet[str]) -> None:
+        self.value = value
+        self.size = size
+        self.expires = expires
+        self.tables = tables
+
+
+class QueryCache:
+    """
+    Thread-safe LRU result cache.
+
+    - max_bytes: total estimated size of cached results
+    - ttl: seconds an entry stays fresh (None = no expiry)
+    - invalidate_tables(): drops every entry that read from those tables
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl: Optional[float] = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._by_table: Dict[str, Set[CacheKey]] = {}
+        self._bytes = 0
+        self._generation = 0  # bumped by every invalidation
+        self._lock = threading.RLock()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        """Return (True, value) on a fresh hit, (False, None) otherwise."""
+        state, value = self.lookup(key)
+        return state == FRESH, value
+
+    def lookup(self, key: CacheKey, stale_for: float = 0.0) -> Tuple[str, Any]:
+        """
+        Return (FRESH, value), (STALE, value) or (MISS, None).
+        Entries past their TTL are still served as STALE for stale_for
+        seconds (stale-while-revalidate), then dropped.
+        """
+        with self._lock:
+            now = self._clock()
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires + stale_for < now:
+                self._remove(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return MISS, None
+            self._entries.move_to_end(key)
+            if entry.expires < now:
+                self._stats["stale_hits"] += 1
+                return STALE, entry.value
+            self._stats["hits"] += 1
+            return FRESH, entry.value
+
+    def generation(self) -> int:
+        """Token to pass to put() so results read before a write are dropped."""
+        return self._generation
+
+    def put(self, key: CacheKey, value: Any, ttl: Optional[float] = None,
+            generation: Optional[int] = None) -> None:
+        """
+        Store a result; results bigger than max_bytes are not cached.
+        If generation (from generation() taken before running the query) is
+        outdated, an invalidation happened meanwhile and nothing is stored.
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires = self._clock() + ttl if ttl is not None else float("inf")
+        tables = tables_read(key[0])
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, size, expires, tables)
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        """Drop every entry that read from any of tables; returns the count."""
+        dropped = 0
+        with self._lock:
+            self._generation += 1
+            for table in {t.lower() for t in tables}:
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    dropped += 1
+            self._stats["invalidations"] += dropped
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus hit_ratio, entries and bytes."""
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            served = snapshot["hits"] + snapshot["stale_hits"]
+            lookups = served + snapshot["misses"]
+            snapshot["hit_ratio"] = served / lookups if lookups else 0.0
+            snapshot["entries"] = len(self._entries)
+            snapshot["bytes"] = self._bytes
+        return snapshot
+
+
+@contextmanager
+def track_writes(conn: Any) -> Iterator[Set[str]]:
+    """
+    Collect the tables written by statements run on a sqlite3 connection
+    inside the block (via its trace callback).
+    """
+    written: Set[str] = set()
+
+    def trace(statement: str) -> None:
+        written.update(tables_written(statement))
+
+    conn.set_trace_callback(trace)
+    try:
+        yield written
+    finally:
+        conn.set_trace_callback(None)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Thread-safe call coalescing: while fn() runs for a key, other threads
+    asking for the same key wait and receive the same result (or error).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, _Call] = {}
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run or join fn for key; returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    def in_flight(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._calls
+
+
+class AsyncSingleFlight:
+    """
+    asyncio call coalescing: the first caller's coroutine runs as a task
+    and every concurrent caller for the key awaits that task. Cancelling
+    one caller does not cancel the shared work.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Any, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Any, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run or join fn() (a coroutine function) for key."""
+        slot = (asyncio.get_running_loop(), key)
+        task = self._calls.get(slot)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[slot] = task
+            task.add_done_callback(lambda _: self._calls.pop(slot, None))
+        return await asyncio.shield(task), shared
+
+    def in_flight(self, key: Any) -> bool:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return (loop, key) in self._calls
+
+
+_stores: "weakref.WeakSet[Any]" = weakref.WeakSet()
+_stores_lock = threading.Lock()
+
+
+def register_store(store: Any) -> Any:
+    """Track store so invalidate_all() reaches it; returns store."""
+    with _stores_lock:
+        _stores.add(store)
+    return store
+
+
+def invalidate_all(tables: Iterable[str]) -> int:
+    """Invalidate tables in every registered store; returns entries dropped."""
+    tables = list(tables)
+    with _stores_lock:
+        stores = list(_stores)
+    return sum(store.invalidate_tables(tables) for store in stores)
+
+
+def _make_default_cache() -> Any:
+    """In-process QueryCache, or the shared file store if QUERY_CACHE_PATH is set."""
+    path = os.environ.get("QUERY_CACHE_PATH")
+    if path:
+        from shared_cache import SQLiteCacheStore
+        return SQLiteCacheStore(path)
+    return QueryCache()
+
+
+default_cache = register_store(_make_default_cache())
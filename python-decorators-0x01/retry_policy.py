@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Retry policy used by retry_on_failure.
+
+- is_retryable(err): True only for transient lock/contention errors:
+  SQLite SQLITE_BUSY / SQLITE_LOCKED ("database is locked") and MySQL
+  deadlock (1213) / lock wait timeout (1205); everything else (syntax
+  errors, missing tables, constraint violations) fails immediately
+- backoff_delay(attempt, base, cap): exponential backoff with full jitter,
+  a uniform draw from [0, min(cap, base * 2**(attempt-1))] for the 1-based
+  attempt number, so clients that failed together do not retry together
+- RetryBudget: process-wide token bucket; every call earns `ratio` of a
+  retry and every retry spends one, so retries stay a bounded fraction of
+  traffic and stop entirely (fail fast) while the database keeps failing
+- RetryStats: counters for calls, attempts, retries and time spent backing off
+"""
+
+import random
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+MYSQL_LOCK_WAIT_TIMEOUT = 1205
+MYSQL_DEADLOCK = 1213
+RETRYABLE_MYSQL_ERRNOS = (MYSQL_LOCK_WAIT_TIMEOUT, MYSQL_DEADLOCK)
+
+_SQLITE_LOCK_MESSAGES = ("is locked", "is busy")
+
+
+def is_retryable(err: BaseException) -> bool:
+    """Whether err is a transient lock/contention error worth retrying."""
+    if isinstance(err, sqlite3.OperationalError):
+        code = getattr(err, "sqlite_errorcode", None)  # Python 3.11+
+        if code is not None:
+            return code & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED)
+        message = str(err).lower()
+        return any(m in message for m in _SQLITE_LOCK_MESSAGES)
+    # mysql-connector sets .errno; PyMySQL/aiomysql put the code in args[0]
+    errno = getattr(err, "errno", None)
+    if errno is None and err.args and isinstance(err.args[0], int):
+        errno = err.args[0]
+    return errno in RETRYABLE_MYSQL_ERRNOS
+
+
+def backoff_delay(attempt: int, base: float, cap: float,
+                  rng: Optional[random.Random] = None) -> float:
+    """Full-jitter delay before retry number `attempt` (1-based)."""
+    return (rng or random).uniform(0.0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of calls.
+
+    - ratio: retry tokens earned per call (0.1 = at most ~10% extra load)
+    - capacity: most tokens saved up, i.e. the largest burst of retries
+    """
+
+    def __init__(self, ratio: float = 0.1, capacity: float = 10.0) -> None:
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """Credit one call."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take one retry token; False means the budget is exhausted."""
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+
+class RetryStats:
+    """Thread-safe counters shared by retry_on_failure wrappers."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "succeeded_after_retry": 0,
+            "gave_up": 0,
+            "not_retryable": 0,
+            "budget_exhausted": 0,
+            "backoff_seconds": 0.0,
+        }
+
+    def count(self, name: str, n: Any = 1) -> None:
+        with self._lock:
+            self._stats[name] += n
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+
+default_budget = RetryBudget()
+default_stats = RetryStats()
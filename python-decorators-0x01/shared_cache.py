@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Cross-process query-result cache stored in a SQLite file.
+
+SQLiteCacheStore has the same interface as result_cache.QueryCache, so it
+plugs into cache_query(cache=...) and transactional's invalidation. Every
+process (gunicorn workers, cron runs) that opens the same file shares one
+warm cache, and entries survive restarts.
+
+- WAL journal: readers never block each other or the single writer
+- values are row tuples serialized with marshal (compact, no code
+  execution on load); results marshal can't encode are not cached
+- size bound: least recently used entries are evicted once the total
+  stored bytes exceed max_bytes (access times are refreshed at most once
+  per touch_interval to keep hits read-only)
+- invalidation and the generation token live in the file too, so a write
+  committed in one process invalidates the cache for all of them
+
+Set QUERY_CACHE_PATH to make this the default cache (see result_cache).
+"""
+
+import hashlib
+import marshal
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from result_cache import CacheKey, FRESH, MISS, STALE, tables_read
+
+# marshal output is only guaranteed stable within one Python version
+FORMAT = f"marshal-{sys.version_info[0]}.{sys.version_info[1]}".encode()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key BLOB PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS entry_tables (
+    tbl TEXT NOT NULL,
+    key BLOB NOT NULL,
+    PRIMARY KEY (tbl, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('generation', 0), ('bytes', 0);
+"""
+
+
+_MARSHAL_SAFE = (type(None), bool, int, float, complex, str, bytes)
+
+
+def _canonical(value: Any) -> Any:
+    """value with anything marshal can't encode (date, Decimal...) spelled out."""
+    if isinstance(value, _MARSHAL_SAFE):
+        return value
+    if isinstance(value, (tuple, list)):
+        return tuple(_canonical(v) for v in value)
+    cls = type(value)
+    return ("\0repr", f"{cls.__module__}.{cls.__qualname__}", repr(value))
+
+
+def _digest(key: CacheKey) -> bytes:
+    """Fixed-size binary id for a (sql, params) key."""
+    try:
+        payload = marshal.dumps(key)
+    except ValueError:
+        payload = marshal.dumps(_canonical(key))
+    return hashlib.blake2b(FORMAT + payload, digest_size=16).digest()
+
+
+class SQLiteCacheStore:
+    """Query-result cache shared by every process opening `path`."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = 300.0,
+        touch_interval: float = 1.0,
+        busy_timeout: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        # per-process counters; entries/bytes come from the shared file
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (and per process after a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def _delete(self, conn: sqlite3.Connection, digest: bytes) -> None:
+        """Remove one entry (caller holds a write transaction)."""
+        row = conn.execute(
+            "SELECT size FROM entries WHERE key = ?", (digest,)
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM entries WHERE key = ?", (digest,))
+        conn.execute("DELETE FROM entry_tables WHERE key = ?", (digest,))
+        conn.execute(
+            "UPDATE meta SET value = value - ? WHERE name = 'bytes'", (row[0],)
+        )
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        """Return (True, value) on a fresh hit, (False, None) otherwise."""
+        state, value = self.lookup(key)
+        return state == FRESH, value
+
+    def lookup(self, key: CacheKey, stale_for: float = 0.0) -> Tuple[str, Any]:
+        """Return (FRESH, value), (STALE, value) or (MISS, None)."""
+        digest = _digest(key)
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires, accessed FROM entries WHERE key = ?",
+            (digest,),
+        ).fetchone()
+        now = time.time()
+        if row is not None and row[1] + stale_for < now:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete(conn, digest)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._count("expirations")
+            row = None
+        if row is None:
+            self._count("misses")
+            return MISS, None
+        value, expires, accessed = row
+        if now - accessed > self.touch_interval:
+            try:
+                conn.execute(
+                    "UPDATE entries SET accessed = ? WHERE key = ?", (now, digest)
+                )
+            except sqlite3.OperationalError:
+                pass  # LRU touch is best effort; never fail a hit on it
+        if expires < now:
+            self._count("stale_hits")
+            return STALE, marshal.loads(value)
+        self._count("hits")
+        return FRESH, marshal.loads(value)
+
+    def generation(self) -> int:
+        """Token to pass to put() so results read before a write are dropped."""
+        return self._conn().execute(
+            "SELECT value FROM meta WHERE name = 'generation'"
+        ).fetchone()[0]
+
+    def put(self, key: CacheKey, value: Any, ttl: Optional[float] = None,
+            generation: Optional[int] = None) -> None:
+        """Store a result; unmarshalable or oversized results are skipped."""
+        try:
+            blob = marshal.dumps(value)
+        except ValueError:
+            return
+        size = len(blob)
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires = now + ttl if ttl is not None else float("inf")
+        digest = _digest(key)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if generation is not None and generation != self.generation():
+                conn.execute("ROLLBACK")
+                return
+            self._delete(conn, digest)
+            conn.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?)",
+                (digest, blob, size, expires, now),
+            )
+            conn.executemany(
+                "INSERT INTO entry_tables VALUES (?, ?)",
+                ((t, digest) for t in tables_read(key[0])),
+            )
+            conn.execute(
+                "UPDATE meta SET value = value + ? WHERE name = 'bytes'", (size,)
+            )
+            evicted = self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if evicted:
+            self._count("evictions", evicted)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        """Drop least recently used entries until under max_bytes."""
+        evicted = 0
+        while True:
+            total = conn.execute(
+                "SELECT value FROM meta WHERE name = 'bytes'"
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return evicted
+            oldest = conn.execute(
+                "SELECT key FROM entries ORDER BY accessed LIMIT 16"
+            ).fetchall()
+            if not oldest:
+                return evicted
+            for (digest,) in oldest:
+                self._delete(conn, digest)
+                evicted += 1
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        """Drop every entry that read from any of tables, in all processes."""
+        names = sorted({t.lower() for t in tables})
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE meta SET value = value + 1 WHERE name = 'generation'"
+            )
+            digests = set()
+            for name in names:
+                digests.update(
+                    d for (d,) in conn.execute(
+                        "SELECT key FROM entry_tables WHERE tbl = ?", (name,)
+                    )
+                )
+            for digest in digests:
+                self._delete(conn, digest)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._count("invalidations", len(digests))
+        return len(digests)
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM entry_tables")
+            conn.execute("UPDATE meta SET value = 0 WHERE name = 'bytes'")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, key: Any) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM entries WHERE key = ?", (_digest(key),)
+        ).fetchone() is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """This process's counters plus the shared entries and bytes."""
+        with self._stats_lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+        served = snapshot["hits"] + snapshot["stale_hits"]
+        lookups = served + snapshot["misses"]
+        snapshot["hit_ratio"] = served / lookups if lookups else 0.0
+        snapshot["entries"] = len(self)
+        snapshot["bytes"] = self._conn().execute(
+            "SELECT value FROM meta WHERE name = 'bytes'"
+        ).fetchone()[0]
+        return snapshot
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Slow-query detection with automatic EXPLAIN capture.
+
+Pooled connections (db_connection.py) time every statement, from
+execute() through its fetch calls. Once a statement runs past the
+threshold, SlowQueryLog.observe() records:
+
+- the SQL and its fingerprint (query_metrics.fingerprint)
+- the bound parameters, redacted to their types (and string lengths)
+- the query plan: EXPLAIN QUERY PLAN on SQLite, EXPLAIN on MySQL, run on
+  the same connection and cached per statement for plan_ttl seconds
+- the caller stack (innermost frames outside the connection layer)
+
+Entries go to a fixed-size ring buffer that can be read at runtime:
+recent(), top(), full_scans() (plans that scan a whole table, e.g.
+"SCAN users" for SELECT * FROM users WHERE age > 40) and dump().
+
+Environment vars (optional): SLOW_QUERY_MS (threshold, default 100)
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, TextIO, Tuple
+
+from query_metrics import fingerprint
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "100"))
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+# frames from these files are the plumbing, not the caller
+_INTERNAL_FILES = ("db_connection.py", "slow_queries.py")
+
+
+def redact(params: Any) -> Any:
+    """Replace bound values with their type (and length for str/bytes)."""
+    def one(value: Any) -> str:
+        if value is None:
+            return "NULL"
+        if isinstance(value, (str, bytes)):
+            return f"<{type(value).__name__}:{len(value)}>"
+        return f"<{type(value).__name__}>"
+
+    if isinstance(params, dict):
+        return {k: one(v) for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [one(v) for v in params]
+    return one(params)
+
+
+def explain(conn: Any, sql: str, params: Any = ()) -> List[str]:
+    """Query plan lines for sql (empty for statements that can't be explained)."""
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    if isinstance(conn, sqlite3.Connection):
+        # plain Cursor: don't count or time the EXPLAIN itself
+        cursor = conn.cursor(sqlite3.Cursor)
+        try:
+            rows = cursor.execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+        finally:
+            cursor.close()
+        return [row[-1] for row in rows]
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXPLAIN " + sql, params or ())
+        names = [d[0] for d in cursor.description]
+        return [
+            ", ".join(f"{n}={v}" for n, v in zip(names, row) if v is not None)
+            for row in cursor.fetchall()
+        ]
+    finally:
+        cursor.close()
+
+
+def is_full_scan(plan: List[str]) -> bool:
+    """Whether a plan reads a whole table (SQLite SCAN / MySQL type=ALL)."""
+    for line in plan:
+        if line.startswith("SCAN ") and " USING " not in line:
+            return True
+        if "type=ALL" in line:
+            return True
+    return False
+
+
+class SlowQueryLog:
+    """
+    Ring buffer of statements slower than threshold_ms.
+
+    - capacity: entries kept (oldest dropped first)
+    - plan_ttl: seconds a statement's captured plan is reused
+    - stack_depth: caller frames kept per entry
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        capacity: int = 256,
+        plan_ttl: float = 60.0,
+        stack_depth: int = 8,
+    ) -> None:
+        self.threshold = threshold_ms / 1000.0
+        self.plan_ttl = plan_ttl
+        self.stack_depth = stack_depth
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self._plans: Dict[str, Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+        self.observed = 0
+
+    def _plan(self, conn: Any, sql: str, params: Any) -> List[str]:
+        now = time.monotonic()
+        cached = self._plans.get(sql)
+        if cached is not None and now - cached[0] < self.plan_ttl:
+            return cached[1]
+        try:
+            plan = explain(conn, sql, params)
+        except Exception as e:
+            plan = [f"EXPLAIN failed: {e}"]
+        if len(self._plans) >= 1024:
+            self._plans.clear()
+        self._plans[sql] = (now, plan)
+        return plan
+
+    def _caller_stack(self) -> List[str]:
+        frames = [
+            f for f in traceback.extract_stack()
+            if not f.filename.endswith(_INTERNAL_FILES)
+        ]
+        return [f"{f.filename}:{f.lineno} in {f.name}"
+                for f in frames[-self.stack_depth:]]
+
+    def observe(self, conn: Any, sql: str, params: Any, seconds: float) -> Dict[str, Any]:
+        """
+        Record a statement that crossed the threshold and return its entry.
+        The entry is a live dict: callers may keep adding to "seconds" as
+        the statement's remaining rows are fetched.
+        """
+        plan = self._plan(conn, sql, params)
+        entry = {
+            "at": time.time(),
+            "seconds": seconds,
+            "sql": sql,
+            "fingerprint": fingerprint(sql),
+            "params": redact(params),
+            "plan": plan,
+            "full_scan": is_full_scan(plan),
+            "stack": self._caller_stack(),
+            "thread": threading.current_thread().name,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.observed += 1
+        return entry
+
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Newest entries first."""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        return entries if n is None else entries[:n]
+
+    def top(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Slowest entries first."""
+        return sorted(self.recent(), key=lambda e: e["seconds"], reverse=True)[:n]
+
+    def full_scans(self) -> List[Dict[str, Any]]:
+        """Newest entry per fingerprint whose plan scans a whole table."""
+        seen: Dict[str, Dict[str, Any]] = {}
+        for entry in self.recent():
+            if entry["full_scan"]:
+                seen.setdefault(entry["fingerprint"], entry)
+        return list(seen.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._plans.clear()
+
+    def dump(self, file: TextIO = sys.stdout, n: int = 10) -> None:
+        """Print the slowest entries with their plans and innermost caller."""
+        for entry in self.top(n):
+            caller = entry["stack"][-1] if entry["stack"] else "?"
+            print(f"{entry['seconds'] * 1000.0:9.3f} ms  {entry['fingerprint']}  "
+                  f"params={entry['params']}  ({caller})", file=file)
+            for line in entry["plan"]:
+                print(f"{'':>14}{line}", file=file)
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for 4-cache_query.cache_query single-flight behaviour.
+"""
+import contextlib
+import importlib
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from result_cache import QueryCache
+
+_tmp = tempfile.TemporaryDirectory()
+
+
+def _make_db(name, rows):
+    path = os.path.join(_tmp.name, name)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO users (name) VALUES (?)",
+                     [(f"user {i}",) for i in range(rows)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def setUpModule():
+    """Import 4-cache_query against a temporary users.db (it runs an example)."""
+    global cache_query
+    os.environ["USERS_DB"] = _make_db("users.db", 3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cache_query = importlib.import_module("4-cache_query").cache_query
+
+
+def tearDownModule():
+    _tmp.cleanup()
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Concurrent misses are coalesced per decorated function only."""
+
+    def setUp(self):
+        self.users_db = _make_db(f"{self.id()}-users.db", 100)
+        self.other_db = _make_db(f"{self.id()}-other.db", 0)
+
+    def _count_on(self, path, cache, started, proceed):
+        @cache_query(cache=cache)
+        def count(conn, query):
+            started.set()
+            proceed.wait(5)
+            return conn.execute(query).fetchall()
+
+        def call(results, name):
+            conn = sqlite3.connect(path)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = count(conn, "SELECT count(*) FROM users")
+            finally:
+                conn.close()
+        return call
+
+    def test_functions_do_not_share_flights(self):
+        """Two functions running the same SQL on different databases each run it."""
+        results = {}
+        proceed = threading.Event()
+        users_started, other_started = threading.Event(), threading.Event()
+        users_cache, other_cache = QueryCache(), QueryCache()
+        users_call = self._count_on(self.users_db, users_cache,
+                                    users_started, proceed)
+        other_call = self._count_on(self.other_db, other_cache,
+                                    other_started, proceed)
+        first = threading.Thread(target=users_call, args=(results, "users"))
+        first.start()
+        self.assertTrue(users_started.wait(5))
+        second = threading.Thread(target=other_call, args=(results, "other"))
+        second.start()
+        other_started.wait(1)
+        proceed.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(results["users"], [(100,)])
+        self.assertEqual(results["other"], [(0,)])
+        self.assertEqual(len(other_cache), 1)
+
+    def test_same_function_shares_flight(self):
+        """Concurrent misses on one function run the query once."""
+        results = {}
+        runs = []
+        started, proceed = threading.Event(), threading.Event()
+
+        @cache_query(cache=QueryCache())
+        def count(conn, query):
+            runs.append(query)
+            started.set()
+            proceed.wait(5)
+            return conn.execute(query).fetchall()
+
+        def call(name):
+            conn = sqlite3.connect(self.users_db)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = count(conn, "SELECT count(*) FROM users")
+            finally:
+                conn.close()
+
+        threads = [threading.Thread(target=call, args=(n,)) for n in ("a", "b")]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        threads[1].start()
+        threads[1].join(0.2)  # let it join the flight
+        proceed.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(runs, ["SELECT count(*) FROM users"])
+        self.assertEqual(results, {"a": [(100,)], "b": [(100,)]})
+
+
+if __name__ == "__main__":
+    unittest.main()
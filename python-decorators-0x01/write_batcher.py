@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Group commit for transactional writes.
+
+WriteBatcher queues write calls and runs them on one background thread,
+committing many calls as a single transaction instead of one each:
+
+- a batch is flushed once max_batch calls are queued or max_delay seconds
+  have passed since its first call, whichever comes first
+- every call runs inside its own SAVEPOINT: a call that raises is rolled
+  back to its savepoint and fails alone, the rest of the batch commits
+- a caller's result (or error) is only delivered after the COMMIT, so a
+  success means the write is durable; if the COMMIT itself fails, every
+  call in the batch gets that error
+- cached query results for the tables written are invalidated once per
+  batch in every registered cache, as transactional does per call
+
+Batched functions take the connection as their first argument, like
+transactional ones, and must not commit or roll back themselves.
+"""
+
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from db_connection import DB_PATH, SQLitePool, get_pool
+from result_cache import invalidate_all, register_store, track_writes
+
+_STOP = object()
+
+
+class _Call:
+    __slots__ = ("func", "args", "kwargs", "future")
+
+    def __init__(self, func: Callable[..., Any], args: tuple,
+                 kwargs: Dict[str, Any]) -> None:
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+
+
+class WriteBatcher:
+    """
+    Coalesce write calls into group-committed transactions.
+
+    - max_batch: calls per transaction at most
+    - max_delay: seconds the first queued call waits for company
+    - max_pending: queued calls before submit() blocks (backpressure)
+    - cache: an extra store to invalidate on commit (stores used through
+      cache_query are registered already)
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        *,
+        pool: Optional[SQLitePool] = None,
+        max_batch: int = 100,
+        max_delay: float = 0.005,
+        max_pending: int = 10_000,
+        cache: Any = None,
+    ) -> None:
+        self.pool = pool if pool is not None else get_pool(db_path or DB_PATH)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        if cache is not None:
+            register_store(cache)
+        self._queue: "queue.Queue[Any]" = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "failed_calls": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "largest_batch": 0,
+        }
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue func(conn, *args, **kwargs); the Future resolves after COMMIT."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="write-batcher", daemon=True
+                    )
+                    self._thread.start()
+        call = _Call(func, args, kwargs)
+        self._queue.put(call)
+        return call.future
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Decorator form: calling the result blocks until the batch holding
+        the call has committed; .submit(...) returns the Future instead.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.submit(func, *args, **kwargs).result()
+        wrapper.submit = functools.partial(self.submit, func)
+        return wrapper
+
+    def close(self) -> None:
+        """Flush everything queued so far and stop the flusher thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _run(self) -> None:
+        conn = self.pool.acquire()
+        try:
+            stop = False
+            while not stop:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    timeout = deadline - time.monotonic()
+                    try:
+                        item = (self._queue.get(timeout=timeout) if timeout > 0
+                                else self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                self._flush(conn, batch)
+        finally:
+            self.pool.release(conn)
+
+    def _flush(self, conn: Any, batch: List[_Call]) -> None:
+        """Run one batch in a transaction, one savepoint per call."""
+        calls = [c for c in batch if c.future.set_running_or_notify_cancel()]
+        outcomes = []
+        try:
+            with track_writes(conn) as written:
+                conn.execute("BEGIN")
+                for call in calls:
+                    conn.execute("SAVEPOINT batched_call")
+                    try:
+                        result = call.func(conn, *call.args, **call.kwargs)
+                    except Exception as err:
+                        conn.execute("ROLLBACK TO batched_call")
+                        conn.execute("RELEASE batched_call")
+                        outcomes.append((call, False, err))
+                        continue
+                    conn.execute("RELEASE batched_call")
+                    outcomes.append((call, True, result))
+            conn.commit()
+        except BaseException as err:
+            if conn.in_transaction:
+                conn.rollback()
+            for call in calls:
+                call.future.set_exception(err)
+            with self._lock:
+                self._stats["failed_batches"] += 1
+                self._stats["failed_calls"] += len(calls)
+            if not isinstance(err, Exception):
+                raise
+            return
+        if written:
+            invalidate_all(written)
+        failed = 0
+        for call, ok, value in outcomes:
+            if ok:
+                call.future.set_result(value)
+            else:
+                call.future.set_exception(value)
+                failed += 1
+        with self._lock:
+            self._stats["calls"] += len(calls)
+            self._stats["failed_calls"] += failed
+            self._stats["batches"] += 1
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(calls))
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus the average committed batch size."""
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+        batches = snapshot["batches"]
+        snapshot["avg_batch"] = snapshot["calls"] / batches if batches else 0.0
+        snapshot["pending"] = self._queue.qsize()
+        return snapshot
@@ -2,56 +2,54 @@
 """
 Stream users from MySQL one-by-one using a Python generator.
 
-Connects to the ALX_prodev DB and yields rows from user_data as dicts.
-Environment vars (optional): MYSQL_HOST, MYSQL_USER, MYSQL_PASSWORD
+Borrows an ALX_prodev connection from the seed pool and yields rows from
+user_data as dicts (or tuples / records, see decoders.py).
+Environment vars (optional): MYSQL_HOST, MYSQL_USER, MYSQL_PASSWORD,
+MYSQL_POOL_SIZE
 """
 
-import os
-from typing import Generator, Dict, Any
-from decimal import Decimal
+from typing import Generator, Any
 
-import mysql.connector  # pip install mysql-connector-python
+import seed
+from decoders import RowDecoder
 
+QUERY = "SELECT user_id, name, email, age FROM user_data ORDER BY user_id"
 
-MYSQL_HOST = os.environ.get("MYSQL_HOST", "localhost")
-MYSQL_USER = os.environ.get("MYSQL_USER", "root")
-MYSQL_PASSWORD = os.environ.get("MYSQL_PASSWORD", "")
-DB_NAME = "ALX_prodev"
 
-
-def _normalize_age(value: Any) -> Any:
-    """Convert Decimal ages to int (if integral) or float for clean printing."""
-    if isinstance(value, Decimal):
-        try:
-            i = int(value)
-            return i if value == i else float(value)
-        except Exception:
-            return float(value)
-    return value
-
-
-def stream_users() -> Generator[Dict[str, Any], None, None]:
+def stream_users(
+    unbuffered: bool = False,
+    read_ahead: int = seed.STREAM_READ_AHEAD,
+    shape: str = "dict",
+) -> Generator[Any, None, None]:
     """
     Yield rows from user_data as dictionaries, one by one.
     Uses exactly one loop over the cursor.
+
+    unbuffered=True reads through an explicitly unbuffered cursor holding at
+    most read_ahead rows client-side, so memory stays flat on huge tables.
+    shape="tuple" or "record" yields tuples or __slots__ records instead
+    (see decoders.RowDecoder); DECIMAL ages become int or float either way.
     """
-    conn = mysql.connector.connect(
-        host=MYSQL_HOST,
-        user=MYSQL_USER,
-        password=MYSQL_PASSWORD,
-        database=DB_NAME,
-    )
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute(
-            "SELECT user_id, name, email, age FROM user_data ORDER BY user_id"
-        )
+    if unbuffered:
+        yield from _stream_users_unbuffered(read_ahead, shape)
+        return
+    with seed.get_pool().connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERY)
+        decode = RowDecoder.from_description(cursor.description, shape).decode
         for row in cursor:  # <-- single loop
-            row = dict(row)
-            row["age"] = _normalize_age(row.get("age"))
-            yield row
-    finally:
-        try:
-            cursor.close()
-        finally:
-            conn.close()
+            yield decode(row)
+        # Closed only when exhausted: closing early would drain the rest of
+        # the result, and the pool discards the connection without reading it.
+        cursor.close()
+
+
+def _stream_users_unbuffered(
+    read_ahead: int, shape: str
+) -> Generator[Any, None, None]:
+    """Row-by-row view over seed.stream_rows() chunks."""
+    with seed.get_pool().connection() as conn:
+        for chunk in seed.stream_rows(
+            conn, QUERY, read_ahead=read_ahead, shape=shape
+        ):
+            yield from chunk
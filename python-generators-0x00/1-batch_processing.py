@@ -2,57 +2,87 @@
 """
 Batch streaming and processing of users from MySQL.
 
-- stream_users_in_batches(batch_size): generator yielding lists of dict rows.
+- stream_users_in_batches(batch_size, unbuffered): generator yielding lists
+  of dict rows, optionally through an unbuffered cursor.
+  columnar=True yields columnar.ColumnBatch objects instead.
 - batch_processing(batch_size): prints users with age > 25, batch by batch.
 """
 
-import os
-from typing import Generator, List, Dict, Any
-import mysql.connector  # pip install mysql-connector-python
+from typing import Generator, List, Any, Optional
+import seed
+from columnar import ColumnBatch, USER_COLUMNS
+from decoders import RowDecoder
 
 
-MYSQL_HOST = os.environ.get("MYSQL_HOST", "localhost")
-MYSQL_USER = os.environ.get("MYSQL_USER", "root")
-MYSQL_PASSWORD = os.environ.get("MYSQL_PASSWORD", "")
-DB_NAME = "ALX_prodev"
-
-
-def stream_users_in_batches(batch_size: int) -> Generator[List[Dict[str, Any]], None, None]:
+def stream_users_in_batches(
+    batch_size: int,
+    unbuffered: bool = False,
+    columnar: bool = False,
+    shape: str = "dict",
+) -> Generator[Any, None, None]:
     """
     Yield rows from user_data in batches (as a list of dicts).
     Uses a single loop overall (while True) to stream batches.
+
+    unbuffered=True uses an explicitly unbuffered cursor, so only the current
+    batch is held client-side regardless of table size.
+    columnar=True yields columnar.ColumnBatch objects built from tuple rows
+    instead of lists of dicts.
+    shape="tuple" or "record" yields lists of tuples or __slots__ records
+    (see decoders.RowDecoder).
     """
-    conn = mysql.connector.connect(
-        host=MYSQL_HOST,
-        user=MYSQL_USER,
-        password=MYSQL_PASSWORD,
-        database=DB_NAME,
+    # Cast age to integer in SQL to avoid Decimal in output
+    query = (
+        "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
+        "FROM user_data ORDER BY user_id"
     )
-    # dictionary=True -> each row is a dict matching sample output
-    cursor = conn.cursor(dictionary=True)
-    try:
-        # Cast age to integer in SQL to avoid Decimal in output
-        cursor.execute(
-            "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
-            "FROM user_data ORDER BY user_id"
-        )
-        while True:  # loop #1
-            rows = cursor.fetchmany(batch_size)
-            if not rows:
-                break
-            yield rows
-    finally:
-        try:
-            cursor.close()
-        finally:
-            conn.close()
-
-
-def batch_processing(batch_size: int) -> None:
+    row_shape = None if columnar else shape
+    with seed.get_pool().connection() as conn:
+        if unbuffered:
+            batches = seed.stream_rows(
+                conn, query, read_ahead=batch_size, shape=row_shape
+            )
+        else:
+            batches = _fetch_batches(conn, query, batch_size, row_shape)
+        for rows in batches:
+            yield ColumnBatch.from_rows(rows, USER_COLUMNS) if columnar else rows
+
+
+def _fetch_batches(
+    conn: Any, query: str, batch_size: int, shape: Optional[str]
+) -> Generator[List[Any], None, None]:
+    """
+    fetchmany() batches from the connection's default cursor. As with
+    seed.stream_rows, the cursor is left open if the consumer stops early.
+    """
+    cursor = conn.cursor()
+    cursor.execute(query)
+    decode = None
+    if shape is not None:
+        decode = RowDecoder.from_description(cursor.description, shape).decode
+    while True:  # loop #1
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows if decode is None else list(map(decode, rows))
+    cursor.close()
+
+
+def batch_processing(batch_size: int, columnar: bool = False) -> None:
     """
     Process users in batches, printing only users older than 25.
     Uses two loops: over batches, then over rows within each batch.
+
+    columnar=True applies the age filter to each batch as a single
+    vectorized comparison and only builds dicts for the rows it keeps.
     """
+    if columnar:
+        for batch in stream_users_in_batches(batch_size, columnar=True):
+            older = batch.filter(batch.compare("age", ">", 25))
+            for user in older.to_dicts():
+                print(user)
+                print()
+        return
     for batch in stream_users_in_batches(batch_size):  # loop #2
         for user in batch:  # loop #3
             if user.get("age", 0) > 25:
@@ -3,45 +3,100 @@
 Lazy pagination over user_data using a generator.
 
 - paginate_users(page_size, offset): fetches one page from the DB.
-- lazy_pagination(page_size): yields each page only when needed.
+- paginate_users_after(page_size, last_user_id): keyset (seek) page fetch.
+- lazy_pagination(page_size, mode, cursor): yields each page only when needed.
   (Single loop total; uses yield.)
+
+Keyset mode seeks by the user_id primary key instead of using OFFSET, so
+every page costs the same no matter how deep the walk is. Pages come back
+in user_id order and can be resumed with the opaque token from next_cursor().
 """
 
-from typing import List, Dict, Any, Generator
+from typing import List, Dict, Any, Generator, Optional
 import seed
+from decoders import RowDecoder
+from pagination_cursor import decode_cursor, encode_cursor, next_cursor  # noqa: F401
+
+
+def _decode_page(cursor: Any) -> List[Dict[str, Any]]:
+    """Fetch the remaining rows as dicts through the shared row decoder."""
+    decode = RowDecoder.from_description(cursor.description).decode
+    return list(map(decode, cursor.fetchall()))
 
 
 def paginate_users(page_size: int, offset: int) -> List[Dict[str, Any]]:
     """
     Fetch a single page from user_data with the given size and offset.
-    Returns a list of dictionaries (rows). Does not keep the connection open.
+    Returns a list of dictionaries (rows). The connection is borrowed from
+    the seed pool and handed back after the page is read.
     """
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    try:
-        cursor.execute(
-            f"SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
-            f"FROM user_data LIMIT {page_size} OFFSET {offset}"
-        )
-        rows = cursor.fetchall()
-        return rows
-    finally:
-        cursor.close()
-        connection.close()
-
-
-def lazy_pagination(page_size: int) -> Generator[List[Dict[str, Any]], None, None]:
+    with seed.get_pool().connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
+                f"FROM user_data LIMIT {int(page_size)} OFFSET {int(offset)}"
+            )
+            return _decode_page(cursor)
+        finally:
+            cursor.close()
+
+
+def paginate_users_after(
+    page_size: int, last_user_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """
-    Lazily yield pages of users. Starts at offset 0 and fetches the next page
-    *only* when the consumer asks for it. Uses exactly one loop.
+    Fetch the page of user_data that follows last_user_id (keyset/seek).
+    With last_user_id=None the first page is returned.
     """
+    with seed.get_pool().connection() as connection:
+        cursor = connection.cursor()
+        try:
+            if last_user_id is None:
+                cursor.execute(
+                    "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
+                    "FROM user_data ORDER BY user_id LIMIT %s",
+                    (int(page_size),),
+                )
+            else:
+                cursor.execute(
+                    "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
+                    "FROM user_data WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                    (last_user_id, int(page_size)),
+                )
+            return _decode_page(cursor)
+        finally:
+            cursor.close()
+
+
+def lazy_pagination(
+    page_size: int, mode: str = "offset", cursor: Optional[str] = None
+) -> Generator[List[Dict[str, Any]], None, None]:
+    """
+    Lazily yield pages of users, fetching the next page *only* when the
+    consumer asks for it. Uses exactly one loop.
+
+    mode="offset" (default) walks with LIMIT/OFFSET starting at offset 0.
+    mode="keyset" seeks by user_id; pass cursor (from next_cursor()) to
+    resume a previous walk.
+    """
+    if mode not in ("offset", "keyset"):
+        raise ValueError(f"unknown pagination mode: {mode!r}")
+    if cursor is not None and mode != "keyset":
+        raise ValueError("cursor is only supported in keyset mode")
+
     offset = 0
+    last_user_id = decode_cursor(cursor) if cursor is not None else None
     while True:  # single loop
-        page = paginate_users(page_size, offset)
+        if mode == "keyset":
+            page = paginate_users_after(page_size, last_user_id)
+        else:
+            page = paginate_users(page_size, offset)
         if not page:
             break
         yield page
         offset += page_size
+        last_user_id = page[-1]["user_id"]
 
 
 # Alias to match the sample main:
@@ -13,23 +13,31 @@ Constraints:
   2) The aggregation loop consuming the generator.
 """
 
-from typing import Generator
+from typing import Generator, Optional
 import seed
 
+# Ages as streamed; server-side aggregates must use the same expression.
+AGE_EXPR = "CAST(age AS UNSIGNED)"
 
-def stream_user_ages() -> Generator[int, None, None]:
-    """Yield user ages one by one from the database (single loop)."""
-    conn = seed.connect_to_prodev()
-    cursor = conn.cursor()
-    try:
+
+def stream_user_ages(
+    key_range: Optional[seed.KeyRange] = None,
+) -> Generator[int, None, None]:
+    """
+    Yield user ages one by one from the database (single loop).
+    key_range=(low, high) limits the scan to low <= user_id < high.
+    """
+    where, params = seed.key_range_clause(key_range or (None, None))
+    with seed.get_pool().connection() as conn:
+        cursor = conn.cursor()
         cursor.execute(
-            "SELECT CAST(age AS UNSIGNED) AS age FROM user_data ORDER BY user_id"
+            f"SELECT {AGE_EXPR} AS age FROM user_data "
+            f"WHERE {where} ORDER BY user_id",
+            params,
         )
         for (age,) in cursor:  # loop #1
             yield int(age)
-    finally:
-        cursor.close()
-        conn.close()
+        cursor.close()  # not on early exit, see seed.stream_rows
 
 
 def _compute_average() -> float:
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Single-pass, mergeable aggregates over the generator pipeline.
+
+- Moments: count / sum / mean / min / max / variance (Welford's update,
+  Chan's formula to merge partial states)
+- TDigest: compact percentile sketch (merging t-digest)
+- Aggregate: Moments + TDigest fed from one stream of numbers
+- aggregate_user_ages(partitions, pushdown): ages of user_data aggregated
+  either on one connection or over primary-key ranges scanned concurrently,
+  with the partial states merged at the end
+
+Every partial state is a plain picklable object, so shards can be
+aggregated anywhere (threads, processes, other hosts) and combined with
+merge().
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import seed
+
+stream_ages = __import__("4-stream_ages")
+
+
+class Moments:
+    """Running count, sum, mean, min, max and variance of a stream."""
+
+    __slots__ = ("count", "mean", "m2", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        """Welford's numerically stable single-value update."""
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other: "Moments") -> "Moments":
+        """Fold another partial state into this one (Chan et al.)."""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            for name in self.__slots__:
+                setattr(self, name, getattr(other, name))
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @classmethod
+    def from_sums(
+        cls, count: int, total: Any, total_sq: Any, low: float, high: float
+    ) -> "Moments":
+        """
+        Rebuild a state from server-side COUNT/SUM/SUM(x*x)/MIN/MAX.
+        m2 is computed in Decimal: in floats, sum(x*x) - sum(x)**2/n
+        cancels catastrophically once the sums are large.
+        """
+        state = cls()
+        if not count:
+            return state
+        total, total_sq = Decimal(total), Decimal(total_sq)
+        state.count = count
+        state.total = float(total)
+        state.mean = float(total / count)
+        state.m2 = max(float(total_sq - total * total / count), 0.0)
+        state.min = float(low)
+        state.max = float(high)
+        return state
+
+    def variance(self, sample: bool = False) -> float:
+        """Population variance, or sample variance with sample=True."""
+        n = self.count - 1 if sample else self.count
+        return self.m2 / n if n > 0 else 0.0
+
+
+class TDigest:
+    """
+    Merging t-digest percentile sketch.
+
+    Values are buffered and periodically merged into at most about
+    `compression` centroids, kept small at the tails so extreme
+    percentiles stay accurate. Digests merge by pooling centroids.
+    """
+
+    def __init__(self, compression: float = 100.0) -> None:
+        self.compression = compression
+        self.centroids: List[Tuple[float, float]] = []  # (mean, weight)
+        self.buffer: List[Tuple[float, float]] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float, weight: float = 1.0) -> None:
+        """Add one value (with an optional weight)."""
+        self.buffer.append((x, weight))
+        self.count += weight
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if len(self.buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """Fold another digest into this one."""
+        self.buffer.extend(other.centroids)
+        self.buffer.extend(other.buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _k(self, q: float) -> float:
+        """Scale function k1: small centroids near q=0 and q=1."""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self) -> None:
+        if not self.buffer:
+            return
+        items = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        total = sum(w for _, w in items)
+        merged: List[Tuple[float, float]] = []
+        mean, weight = items[0]
+        before = 0.0
+        k_low = self._k(0.0)
+        for x, w in items[1:]:
+            q = min((before + weight + w) / total, 1.0)
+            if self._k(q) - k_low <= 1.0:
+                weight += w
+                mean += (x - mean) * w / weight
+            else:
+                merged.append((mean, weight))
+                before += weight
+                k_low = self._k(min(before / total, 1.0))
+                mean, weight = x, w
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-th quantile (0 <= q <= 1); nan when empty."""
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("q must be between 0 and 1")
+        self._compress()
+        if not self.centroids:
+            return math.nan
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        target = q * self.count
+        # each centroid's weight is centred on its mean
+        first_mean, first_w = self.centroids[0]
+        if target <= first_w / 2:
+            span = first_w / 2
+            return self.min + (first_mean - self.min) * (target / span if span else 0)
+        seen = 0.0
+        for (m0, w0), (m1, w1) in zip(self.centroids, self.centroids[1:]):
+            left = seen + w0 / 2
+            right = seen + w0 + w1 / 2
+            if target <= right:
+                return m0 + (m1 - m0) * (target - left) / (right - left)
+            seen += w0
+        last_mean, last_w = self.centroids[-1]
+        span = last_w / 2
+        past = target - (self.count - span)
+        return last_mean + (self.max - last_mean) * (past / span if span else 0)
+
+
+class Aggregate:
+    """Moments plus an optional percentile sketch, fed in a single pass."""
+
+    def __init__(self, percentiles: bool = True, compression: float = 100.0) -> None:
+        self.moments = Moments()
+        self.digest: Optional[TDigest] = TDigest(compression) if percentiles else None
+
+    def add(self, x: float) -> None:
+        self.moments.add(x)
+        if self.digest is not None:
+            self.digest.add(x)
+
+    def update(self, values: Iterable[float]) -> "Aggregate":
+        """Consume an iterable (e.g. a generator) in one pass."""
+        for x in values:
+            self.add(x)
+        return self
+
+    def merge(self, other: "Aggregate") -> "Aggregate":
+        self.moments.merge(other.moments)
+        if self.digest is not None and other.digest is not None:
+            self.digest.merge(other.digest)
+        elif other.digest is None:
+            self.digest = None
+        return self
+
+    def result(self, quantiles: Sequence[float] = (0.5, 0.9, 0.99)) -> Dict[str, Any]:
+        """Plain-dict summary of the state."""
+        m = self.moments
+        out: Dict[str, Any] = {
+            "count": m.count,
+            "sum": m.total,
+            "mean": m.mean if m.count else 0.0,
+            "min": m.min if m.count else None,
+            "max": m.max if m.count else None,
+            "variance": m.variance(),
+            "stddev": math.sqrt(m.variance()),
+        }
+        if self.digest is not None:
+            out["percentiles"] = {q: self.digest.quantile(q) for q in quantiles}
+        return out
+
+
+def _age_partial(key_range: seed.KeyRange, percentiles: bool) -> Aggregate:
+    """Stream the ages of one key range into a fresh partial state."""
+    return Aggregate(percentiles).update(stream_ages.stream_user_ages(key_range))
+
+
+def _age_pushdown(key_range: seed.KeyRange) -> Aggregate:
+    """Let MySQL compute count/sum/sum-of-squares/min/max for one range."""
+    where, params = seed.key_range_clause(key_range)
+    with seed.get_pool().connection() as conn:
+        cursor = conn.cursor()
+        try:
+            age = stream_ages.AGE_EXPR  # same values the streaming path sees
+            cursor.execute(
+                f"SELECT COUNT(*), SUM({age}), SUM({age} * {age}), MIN({age}), MAX({age}) "
+                f"FROM user_data WHERE {where}",
+                params,
+            )
+            count, total, total_sq, low, high = cursor.fetchone()
+        finally:
+            cursor.close()
+    state = Aggregate(percentiles=False)
+    state.moments = Moments.from_sums(count, total or 0, total_sq or 0, low, high)
+    return state
+
+
+def aggregate_user_ages(
+    partitions: int = 1,
+    percentiles: bool = True,
+    pushdown: bool = False,
+    quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+) -> Dict[str, Any]:
+    """
+    Aggregate user ages in one pass.
+
+    partitions > 1 splits user_id into that many ranges and scans them
+    concurrently, each on its own pooled connection, then merges the
+    partial states. pushdown=True asks MySQL for the moments per range
+    (DECIMAL sums are exact) and moves no rows; percentiles need rows, so
+    they are not available with pushdown.
+    """
+    ranges = seed.user_id_ranges(partitions)
+    if pushdown:
+        def work(r: seed.KeyRange) -> Aggregate:
+            return _age_pushdown(r)
+    else:
+        def work(r: seed.KeyRange) -> Aggregate:
+            return _age_partial(r, percentiles)
+    if partitions == 1:
+        partials = [work(ranges[0])]
+    else:
+        workers = min(partitions, seed.get_pool().max_size)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(work, ranges))
+    total = partials[0]
+    for partial in partials[1:]:
+        total.merge(partial)
+    return total.result(quantiles)
+
+
+if __name__ == "__main__":
+    for key, value in aggregate_user_ages().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Async-generator counterparts of the user_data streamers.
+
+- stream_users(source): async generator of rows, one by one
+- stream_users_in_batches(source, batch_size): async generator of row lists
+- lazy_pagination(source, page_size, mode, cursor): async pages
+
+A "source" owns an async connection pool and streams query results in
+bounded chunks:
+
+- MySQLSource: aiomysql pool + server-side (unbuffered) SSCursor
+  (pip install aiomysql)
+- SQLiteSource: stand-in over a SQLite file using the stdlib sqlite3 in
+  worker threads, so the pipeline runs offline with no MySQL server
+
+Each stream holds one pooled connection and reads at most read_ahead rows
+ahead of the consumer. Nothing is fetched until the consumer asks, so many
+streams share one event loop with natural back-pressure, and the pool size
+bounds how many run against the database at once.
+
+Environment vars (optional): MYSQL_HOST, MYSQL_USER, MYSQL_PASSWORD
+"""
+
+import asyncio
+import functools
+import os
+import sqlite3
+from typing import Any, AsyncGenerator, Callable, List, Optional, Sequence
+
+from decoders import RowDecoder
+from pagination_cursor import decode_cursor
+
+try:
+    import aiomysql  # optional: pip install aiomysql
+except ImportError:  # pragma: no cover
+    aiomysql = None
+
+
+MYSQL_HOST = os.environ.get("MYSQL_HOST", "localhost")
+MYSQL_USER = os.environ.get("MYSQL_USER", "root")
+MYSQL_PASSWORD = os.environ.get("MYSQL_PASSWORD", "")
+DB_NAME = "ALX_prodev"
+STREAM_READ_AHEAD = int(os.environ.get("MYSQL_STREAM_READ_AHEAD", "1000"))
+
+USERS_QUERY = "SELECT user_id, name, email, age FROM user_data ORDER BY user_id"
+BATCH_QUERY = (
+    "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
+    "FROM user_data ORDER BY user_id"
+)
+OFFSET_PAGE_QUERY = (
+    "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
+    "FROM user_data LIMIT %s OFFSET %s"
+)
+FIRST_PAGE_QUERY = (
+    "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
+    "FROM user_data ORDER BY user_id LIMIT %s"
+)
+KEYSET_PAGE_QUERY = (
+    "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
+    "FROM user_data WHERE user_id > %s ORDER BY user_id LIMIT %s"
+)
+
+
+async def _in_thread(func: Any, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking call in the default executor (to_thread needs 3.9+)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def _in_thread_settled(
+    func: Any, *args: Any, on_cancel: Optional[Callable[[Any], Any]] = None
+) -> Any:
+    """
+    _in_thread for calls whose connection is reused afterwards. A worker
+    thread can't be interrupted, so if the caller is cancelled this still
+    waits for the call to finish (passing its result to on_cancel) before
+    re-raising; the connection is idle again by then.
+    """
+    loop = asyncio.get_running_loop()
+    call = loop.run_in_executor(None, functools.partial(func, *args))
+    try:
+        return await asyncio.shield(call)
+    except asyncio.CancelledError:
+        while not call.done():
+            try:
+                await asyncio.wait([call])
+            except asyncio.CancelledError:
+                pass
+        if on_cancel is not None and call.exception() is None:
+            on_cancel(call.result())
+        raise
+
+
+class MySQLSource:
+    """aiomysql-backed source; rows stream through an unbuffered cursor."""
+
+    def __init__(self, minsize: int = 1, maxsize: int = 10, **connect_kwargs: Any):
+        if aiomysql is None:
+            raise RuntimeError("aiomysql is required: pip install aiomysql")
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.connect_kwargs = {
+            "host": MYSQL_HOST,
+            "user": MYSQL_USER,
+            "password": MYSQL_PASSWORD,
+            "db": DB_NAME,
+            "autocommit": True,
+            **connect_kwargs,
+        }
+        self._pool = None
+
+    async def open(self) -> "MySQLSource":
+        self._pool = await aiomysql.create_pool(
+            minsize=self.minsize, maxsize=self.maxsize, **self.connect_kwargs
+        )
+        return self
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    async def __aenter__(self) -> "MySQLSource":
+        return await self.open()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def stream(
+        self,
+        query: str,
+        params: Sequence[Any] = (),
+        read_ahead: int = STREAM_READ_AHEAD,
+        shape: Optional[str] = "dict",
+    ) -> AsyncGenerator[List[Any], None]:
+        """Yield decoded chunks of at most read_ahead rows."""
+        async with self._pool.acquire() as conn:
+            cursor = await conn.cursor(aiomysql.SSCursor)
+            finished = False
+            try:
+                await cursor.execute(query, params or None)
+                decode = None
+                if shape is not None:
+                    decode = RowDecoder.from_description(
+                        cursor.description, shape
+                    ).decode
+                while True:
+                    rows = await cursor.fetchmany(read_ahead)
+                    if not rows:
+                        break
+                    yield list(rows) if decode is None else list(map(decode, rows))
+                finished = True
+                await cursor.close()
+            finally:
+                if not finished:
+                    # closing the cursor would drain the rest of the result;
+                    # drop the connection instead (the pool discards it)
+                    conn.close()
+
+
+class SQLiteSource:
+    """
+    Offline stand-in for MySQLSource over a SQLite file.
+
+    A fixed number of sqlite3 connections sit in an asyncio.Queue; blocking
+    calls run in the default thread pool executor; a cancelled stream waits
+    for its in-flight call before the connection goes back. MySQL-style %s
+    placeholders are rewritten to ?.
+    """
+
+    def __init__(self, path: str, maxsize: int = 4) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self._idle: Optional["asyncio.Queue[sqlite3.Connection]"] = None
+
+    async def open(self) -> "SQLiteSource":
+        self._idle = asyncio.Queue()
+        for _ in range(self.maxsize):
+            conn = await _in_thread(
+                sqlite3.connect, self.path, check_same_thread=False
+            )
+            self._idle.put_nowait(conn)
+        return self
+
+    async def close(self) -> None:
+        if self._idle is None:
+            return
+        for _ in range(self.maxsize):
+            conn = await self._idle.get()
+            conn.close()
+        self._idle = None
+
+    async def __aenter__(self) -> "SQLiteSource":
+        return await self.open()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def stream(
+        self,
+        query: str,
+        params: Sequence[Any] = (),
+        read_ahead: int = STREAM_READ_AHEAD,
+        shape: Optional[str] = "dict",
+    ) -> AsyncGenerator[List[Any], None]:
+        """Yield decoded chunks of at most read_ahead rows."""
+        conn = await self._idle.get()
+        try:
+            cursor = await _in_thread_settled(
+                conn.execute, query.replace("%s", "?"), tuple(params),
+                on_cancel=sqlite3.Cursor.close,
+            )
+            try:
+                decode = None
+                if shape is not None:
+                    decode = RowDecoder.from_description(
+                        cursor.description, shape
+                    ).decode
+                while True:
+                    rows = await _in_thread_settled(cursor.fetchmany, read_ahead)
+                    if not rows:
+                        break
+                    yield rows if decode is None else list(map(decode, rows))
+            finally:
+                cursor.close()
+        finally:
+            self._idle.put_nowait(conn)
+
+
+async def _fetch_all(
+    source: Any, query: str, params: Sequence[Any], size: int
+) -> List[Any]:
+    """Collect a small result (one page) from a source."""
+    rows: List[Any] = []
+    chunks = source.stream(query, params, read_ahead=size)
+    try:
+        async for chunk in chunks:
+            rows.extend(chunk)
+    finally:
+        await chunks.aclose()
+    return rows
+
+
+async def stream_users(
+    source: Any, read_ahead: int = STREAM_READ_AHEAD, shape: str = "dict"
+) -> AsyncGenerator[Any, None]:
+    """Async version of 0-stream_users.stream_users: one row at a time."""
+    chunks = source.stream(USERS_QUERY, (), read_ahead, shape)
+    try:
+        async for chunk in chunks:
+            for row in chunk:
+                yield row
+    finally:
+        # async generators are not closed by a broken async for; close the
+        # inner one so its connection goes back to the pool right away
+        await chunks.aclose()
+
+
+async def stream_users_in_batches(
+    source: Any, batch_size: int, shape: str = "dict"
+) -> AsyncGenerator[List[Any], None]:
+    """Async version of 1-batch_processing.stream_users_in_batches."""
+    chunks = source.stream(BATCH_QUERY, (), batch_size, shape)
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await chunks.aclose()
+
+
+async def lazy_pagination(
+    source: Any,
+    page_size: int,
+    mode: str = "offset",
+    cursor: Optional[str] = None,
+) -> AsyncGenerator[List[Any], None]:
+    """Async version of 2-lazy_paginate.lazy_pagination (dict rows)."""
+    if mode not in ("offset", "keyset"):
+        raise ValueError(f"unknown pagination mode: {mode!r}")
+    if cursor is not None and mode != "keyset":
+        raise ValueError("cursor is only supported in keyset mode")
+    offset = 0
+    last_user_id = decode_cursor(cursor) if cursor is not None else None
+    while True:
+        if mode == "offset":
+            query, params = OFFSET_PAGE_QUERY, (int(page_size), offset)
+        elif last_user_id is None:
+            query, params = FIRST_PAGE_QUERY, (int(page_size),)
+        else:
+            query, params = KEYSET_PAGE_QUERY, (last_user_id, int(page_size))
+        page = await _fetch_all(source, query, params, page_size)
+        if not page:
+            break
+        yield page
+        offset += page_size
+        last_user_id = page[-1]["user_id"]
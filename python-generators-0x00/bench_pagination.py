@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-page latency of OFFSET vs keyset pagination at growing depth.
+
+Usage: ./bench_pagination.py [page_size] [sample_every]
+
+Walks user_data once per mode and prints the time taken by every
+sample_every-th page. With OFFSET the time grows with the page number;
+with keyset it should stay flat.
+"""
+
+import sys
+import time
+
+lazy_paginate = __import__("2-lazy_paginate")
+
+
+def bench(mode: str, page_size: int, sample_every: int) -> None:
+    """Time every page of a full walk, printing sampled depths."""
+    pages = lazy_paginate.lazy_pagination(page_size, mode=mode)
+    page_no = 0
+    total = 0.0
+    while True:
+        start = time.perf_counter()
+        page = next(pages, None)
+        elapsed = time.perf_counter() - start
+        if page is None:
+            break
+        total += elapsed
+        if page_no % sample_every == 0:
+            print(f"{mode:>6}  page {page_no:>7}  {elapsed * 1000:8.2f} ms")
+        page_no += 1
+    print(f"{mode:>6}  {page_no} pages in {total:.2f} s\n")
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    every = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    for walk_mode in ("offset", "keyset"):
+        bench(walk_mode, size, every)
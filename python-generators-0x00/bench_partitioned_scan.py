@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-table scan throughput against worker count.
+
+Usage: ./bench_partitioned_scan.py [max_workers] [batch_size]
+
+Compares the single-connection stream_users_in_batches with
+partitioned_scan.scan_users at 1, 2, 4, ... workers, ordered and unordered.
+"""
+
+import sys
+import time
+
+import partitioned_scan
+
+batch_mod = __import__("1-batch_processing")
+
+
+def timed(label: str, batches) -> None:
+    """Drain an iterator of batches and print rows/sec."""
+    start = time.perf_counter()
+    rows = 0
+    for batch in batches:
+        rows += len(batch)
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"{label:>24}  {rows:>10} rows  {elapsed:8.2f} s  {rate:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    timed("single connection",
+          batch_mod.stream_users_in_batches(size, unbuffered=True))
+    n = 1
+    while n <= max_workers:
+        for ordered in (False, True):
+            label = f"{n} workers {'ordered' if ordered else 'unordered'}"
+            timed(label, partitioned_scan.scan_users(n, ordered, size))
+        n *= 2
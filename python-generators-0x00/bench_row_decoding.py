@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: rows/sec for each row-decoding output shape.
+
+Usage: ./bench_row_decoding.py [rows]
+
+Runs offline on synthetic user_data tuples (DECIMAL ages, as the driver
+returns them). "legacy" is the old per-row dict copy + isinstance check.
+"""
+
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+from decoders import RowDecoder, SHAPES
+
+DESCRIPTION = [("user_id", 254), ("name", 253), ("email", 253), ("age", 246)]
+
+
+def legacy(row):
+    """Previous stream_users decoding (driver dict + _normalize_age)."""
+    row = dict(zip(("user_id", "name", "email", "age"), row))
+    value = row.get("age")
+    if isinstance(value, Decimal):
+        i = int(value)
+        row["age"] = i if value == i else float(value)
+    return row
+
+
+def bench(label, decode, rows) -> None:
+    start = time.perf_counter()
+    for row in rows:
+        decode(row)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>8}  {len(rows) / elapsed:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    data = [
+        (str(uuid.uuid4()), f"user {i}", f"user{i}@example.com",
+         Decimal(18 + i % 80))
+        for i in range(count)
+    ]
+    bench("legacy", legacy, data)
+    for shape in SHAPES:
+        bench(shape, RowDecoder.from_description(DESCRIPTION, shape).decode, data)
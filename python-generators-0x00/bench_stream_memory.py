@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Measure peak RSS while streaming user_data, buffered vs unbuffered.
+
+Usage:
+  ./bench_stream_memory.py seed [rows]   # add synthetic rows (default 10M)
+  ./bench_stream_memory.py run           # stream in each mode, print peak RSS
+  ./bench_stream_memory.py cleanup       # delete the synthetic rows
+
+Each mode runs in a fresh child process so its peak RSS is its own.
+Synthetic rows are tagged with a "synthetic_" name prefix.
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+import seed
+
+stream_users_mod = __import__("0-stream_users")
+batch_mod = __import__("1-batch_processing")
+
+DIGITS = " UNION ALL ".join(f"SELECT {d} AS d" for d in range(10))
+MODES = ("stream_users", "stream_users_unbuffered",
+         "batches", "batches_unbuffered")
+
+
+def seed_synthetic(rows: int) -> None:
+    """Insert rows synthetic users in one server-side INSERT ... SELECT."""
+    digits = ", ".join(f"({DIGITS}) d{i}" for i in range(7))
+    number = " + ".join(f"d{i}.d * {10 ** i}" for i in range(7))
+    conn = seed.connect_to_prodev()
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO user_data (user_id, name, email, age) "
+            "SELECT UUID(), CONCAT('synthetic_', n), "
+            "CONCAT('synthetic_', n, '@example.com'), 18 + n % 80 "
+            f"FROM (SELECT {number} AS n FROM {digits}) t "
+            "WHERE n < %s",
+            (rows,),
+        )
+    conn.commit()
+    conn.close()
+
+
+def cleanup() -> None:
+    """Remove the rows added by seed_synthetic()."""
+    conn = seed.connect_to_prodev()
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM user_data WHERE name LIKE 'synthetic\\_%'")
+    conn.commit()
+    conn.close()
+
+
+def child(mode: str) -> None:
+    """Consume one stream and print rows, seconds and peak RSS in KiB."""
+    start = time.perf_counter()
+    count = 0
+    if mode.startswith("stream_users"):
+        for _ in stream_users_mod.stream_users(
+            unbuffered=mode.endswith("unbuffered")
+        ):
+            count += 1
+    else:
+        for batch in batch_mod.stream_users_in_batches(
+            1000, unbuffered=mode.endswith("unbuffered")
+        ):
+            count += len(batch)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode:>24}  {count:>10} rows  {elapsed:8.2f} s  "
+          f"peak RSS {peak / 1024:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "run"
+    if command == "seed":
+        seed_synthetic(int(sys.argv[2]) if len(sys.argv) > 2 else 10_000_000)
+    elif command == "cleanup":
+        cleanup()
+    elif command == "child":
+        child(sys.argv[2])
+    else:
+        for stream_mode in MODES:
+            subprocess.run([sys.executable, __file__, "child", stream_mode],
+                           check=True)
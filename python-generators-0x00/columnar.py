@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Columnar batches of user_data rows.
+
+A ColumnBatch stores one batch as per-column sequences instead of a list of
+dicts: ages are packed into an array('H') (or a NumPy uint16 view when NumPy
+is installed) and text columns are plain lists of str. Predicates such as
+"age > 25" are evaluated for the whole batch at once and produce a mask that
+filter() applies to every column.
+
+- ColumnBatch.from_rows(rows, names): transpose tuple rows into columns
+- batch.compare(name, op, value): boolean mask for the whole batch
+- batch.filter(mask) / batch.select(*names): vectorized filter / projection
+- batch.to_dicts(): back to row dicts (e.g. for printing)
+"""
+
+import operator
+import sys
+from array import array
+from itertools import compress, repeat
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+try:
+    import numpy as np  # optional: pip install numpy
+except ImportError:  # pragma: no cover
+    np = None
+
+
+USER_COLUMNS = ("user_id", "name", "email", "age")
+INT_COLUMNS = {"age": "H"}  # unsigned 16-bit is plenty for ages
+INTERNED_COLUMNS = ("name",)  # repeated values share one str object
+
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def _pack_ints(values: Sequence[Any], typecode: str) -> Any:
+    """Pack integers into a typed array, viewed through NumPy if available."""
+    packed = array(typecode, values)
+    if np is not None:
+        return np.frombuffer(packed, dtype=np.dtype(packed.typecode))
+    return packed
+
+
+class ColumnBatch:
+    """One batch of rows held column by column."""
+
+    __slots__ = ("names", "columns", "length")
+
+    def __init__(self, columns: Dict[str, Sequence[Any]], length: int) -> None:
+        self.names: Tuple[str, ...] = tuple(columns)
+        self.columns = columns
+        self.length = length
+
+    @classmethod
+    def from_rows(
+        cls, rows: Sequence[Sequence[Any]], names: Sequence[str] = USER_COLUMNS
+    ) -> "ColumnBatch":
+        """Build a batch from tuple rows whose fields follow names."""
+        transposed = list(zip(*rows)) if rows else [()] * len(names)
+        columns: Dict[str, Sequence[Any]] = {}
+        for name, values in zip(names, transposed):
+            if name in INT_COLUMNS:
+                columns[name] = _pack_ints(values, INT_COLUMNS[name])
+            elif name in INTERNED_COLUMNS:
+                columns[name] = list(map(sys.intern, values))
+            else:
+                columns[name] = list(values)
+        return cls(columns, len(rows))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def column(self, name: str) -> Sequence[Any]:
+        """Return the raw column (array, NumPy array or list)."""
+        return self.columns[name]
+
+    def compare(self, name: str, op: str, value: Any) -> Any:
+        """
+        Evaluate "column <op> value" for every row in one call.
+        Returns a NumPy bool array or a list of bools.
+        """
+        try:
+            func = OPERATORS[op]
+        except KeyError:
+            raise ValueError(f"unsupported operator: {op!r}") from None
+        col = self.columns[name]
+        if np is not None and isinstance(col, np.ndarray):
+            return func(col, value)
+        return list(map(func, col, repeat(value, self.length)))
+
+    def filter(self, mask: Any) -> "ColumnBatch":
+        """Keep the rows where mask is true, across all columns."""
+        if np is not None and isinstance(mask, np.ndarray):
+            kept = int(mask.sum())
+        else:
+            kept = sum(mask)
+        columns: Dict[str, Sequence[Any]] = {}
+        for name, col in self.columns.items():
+            if np is not None and isinstance(col, np.ndarray):
+                columns[name] = col[np.asarray(mask, dtype=bool)]
+            elif isinstance(col, array):
+                columns[name] = array(col.typecode, compress(col, mask))
+            else:
+                columns[name] = list(compress(col, mask))
+        return ColumnBatch(columns, kept)
+
+    def select(self, *names: str) -> "ColumnBatch":
+        """Projection: a batch sharing only the named columns."""
+        return ColumnBatch({n: self.columns[n] for n in names}, self.length)
+
+    def rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Iterate rows as tuples in column order."""
+        cols = [
+            col.tolist() if np is not None and isinstance(col, np.ndarray)
+            else col
+            for col in self.columns.values()
+        ]
+        return zip(*cols)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize the batch as a list of row dicts."""
+        names = self.names
+        return [dict(zip(names, row)) for row in self.rows()]
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Shared row decoding for the MySQL streamers.
+
+A RowDecoder is built once per result set from cursor.description. It
+picks a converter for each column that needs one (DECIMAL -> int/float)
+and compiles a single function that converts a tuple row and builds the
+requested shape in one step:
+
+- "dict":   {"user_id": ..., "age": ...}  (the historical output)
+- "tuple":  plain tuples, cheapest to build
+- "record": __slots__ objects with attribute access
+
+Columns that arrive already typed (e.g. CAST(age AS UNSIGNED)) get no
+converter and cost nothing extra.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+SHAPES = ("dict", "tuple", "record")
+
+# mysql-connector FieldType codes for DECIMAL and NEWDECIMAL
+DECIMAL_TYPE_CODES = (0, 246)
+
+
+def decimal_to_number(value: Any) -> Any:
+    """Convert a Decimal to int (if integral) or float for clean output."""
+    if value is None:
+        return None
+    i = int(value)
+    return i if value == i else float(value)
+
+
+class Record:
+    """Base for generated __slots__ row records."""
+
+    __slots__ = ()
+
+    def __init__(self, *values: Any) -> None:
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{n}={getattr(self, n)!r}" for n in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@lru_cache(maxsize=None)
+def record_class(names: Tuple[str, ...]) -> type:
+    """Return (and cache) a Record subclass with the given slots."""
+    for name in names:
+        if not name.isidentifier():
+            raise ValueError(f"column {name!r} is not a valid attribute name")
+    return type("Row", (Record,), {"__slots__": names})
+
+
+def _compile(
+    names: Sequence[str],
+    converters: Dict[int, Callable[[Any], Any]],
+    shape: str,
+) -> Callable[[Sequence[Any]], Any]:
+    """Generate one straight-line decode function for the row layout."""
+    env: Dict[str, Any] = {}
+    values = []
+    for i in range(len(names)):
+        if i in converters:
+            env[f"_c{i}"] = converters[i]
+            values.append(f"_c{i}(row[{i}])")
+        else:
+            values.append(f"row[{i}]")
+    if shape == "dict":
+        body = "{" + ", ".join(f"{n!r}: {v}" for n, v in zip(names, values)) + "}"
+    elif shape == "tuple":
+        if not converters:
+            return tuple
+        body = "(" + "".join(f"{v}, " for v in values) + ")"
+    else:
+        cls = record_class(tuple(names))
+        env["_new"] = cls.__new__
+        env["_cls"] = cls
+        lines = ["    r = _new(_cls)"]
+        lines += [f"    r.{n} = {v}" for n, v in zip(names, values)]
+        source = "def decode(row):\n" + "\n".join(lines) + "\n    return r\n"
+        exec(source, env)
+        return env["decode"]
+    exec(f"def decode(row):\n    return {body}\n", env)
+    return env["decode"]
+
+
+class RowDecoder:
+    """Converts tuple rows to a chosen shape with per-column converters."""
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        converters: Optional[Dict[str, Callable[[Any], Any]]] = None,
+        shape: str = "dict",
+    ) -> None:
+        if shape not in SHAPES:
+            raise ValueError(f"unknown row shape: {shape!r}")
+        self.names = tuple(names)
+        self.shape = shape
+        by_index = {
+            self.names.index(name): func
+            for name, func in (converters or {}).items()
+        }
+        self.decode = _compile(self.names, by_index, shape)
+
+    @classmethod
+    def from_description(
+        cls,
+        description: Sequence[Sequence[Any]],
+        shape: str = "dict",
+        overrides: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    ) -> "RowDecoder":
+        """Build a decoder from a DB-API cursor.description."""
+        names = [col[0] for col in description]
+        converters: Dict[str, Callable[[Any], Any]] = {
+            col[0]: decimal_to_number
+            for col in description
+            if col[1] in DECIMAL_TYPE_CODES
+        }
+        converters.update(overrides or {})
+        return cls(names, converters, shape)
+
+    def decode_many(self, rows: Iterable[Sequence[Any]]) -> List[Any]:
+        """Decode a batch of rows."""
+        return list(map(self.decode, rows))
+
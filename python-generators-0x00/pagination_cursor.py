@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Opaque resume tokens for keyset pagination over user_data.
+
+A token wraps the last user_id seen (plus a format version) in URL-safe
+base64, so callers can hand it out and pass it back without depending on
+what is inside. Used by 2-lazy_paginate.py and async_streams.py.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional
+
+
+CURSOR_VERSION = 1
+
+
+def encode_cursor(last_user_id: str) -> str:
+    """Pack the last seen user_id into an opaque, URL-safe resume token."""
+    payload = json.dumps({"v": CURSOR_VERSION, "k": last_user_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token: str) -> str:
+    """Unpack a token made by encode_cursor(). Raises ValueError if invalid."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        if payload.get("v") != CURSOR_VERSION:
+            raise ValueError(f"unsupported cursor version: {payload.get('v')}")
+        return str(payload["k"])
+    except (ValueError, KeyError, TypeError, AttributeError) as err:
+        raise ValueError(f"invalid pagination cursor: {token!r}") from err
+
+
+def next_cursor(page: List[Dict[str, Any]]) -> Optional[str]:
+    """Return the token that resumes right after this page (None if empty)."""
+    if not page:
+        return None
+    return encode_cursor(page[-1]["user_id"])
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Parallel range-partitioned scan of user_data across worker processes.
+
+scan_users(workers, ordered) splits the user_id key space into `workers`
+contiguous ranges (seed.user_id_ranges) and streams each range from its own
+process over its own connection, through an unbuffered cursor. Batches of
+row tuples come back through bounded queues, so a slow consumer throttles
+the workers instead of piling rows up in memory.
+
+- ordered=True: batches come out in user_id order (partition by partition,
+  later partitions read ahead up to `prefetch` batches each)
+- ordered=False: batches come out as soon as any worker produces them
+"""
+
+import multiprocessing as mp
+from typing import Any, Generator, List, Optional, Tuple
+
+import seed
+
+
+QUERY = (
+    "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age "
+    "FROM user_data WHERE {where} ORDER BY user_id"
+)
+
+# queue messages: (partition, kind, payload)
+ROWS, DONE, ERROR = "rows", "done", "error"
+
+
+def _scan_range(
+    index: int, key_range: seed.KeyRange, batch_size: int, out: Any
+) -> None:
+    """Worker process: stream one key range into the out queue."""
+    try:
+        # never reuse the parent's pool: its sockets belong to the parent
+        conn = seed.connect_to_prodev()
+        if conn is None:
+            raise ConnectionError(f"partition {index} could not connect")
+        try:
+            where, params = seed.key_range_clause(key_range)
+            for rows in seed.stream_rows(
+                conn, QUERY.format(where=where), params, read_ahead=batch_size
+            ):
+                out.put((index, ROWS, rows))
+        finally:
+            conn.close()
+        out.put((index, DONE, None))
+    except Exception as err:
+        out.put((index, ERROR, f"{type(err).__name__}: {err}"))
+
+
+def _check(index: int, kind: str, payload: Any) -> Optional[List[Tuple]]:
+    """Turn a queue message into a batch, None when done, or raise."""
+    if kind == ERROR:
+        raise RuntimeError(f"partition {index} failed: {payload}")
+    return payload if kind == ROWS else None
+
+
+def scan_users(
+    workers: int = 4,
+    ordered: bool = False,
+    batch_size: int = 1000,
+    prefetch: int = 4,
+) -> Generator[List[Tuple[Any, ...]], None, None]:
+    """
+    Yield batches of (user_id, name, email, age) tuples from user_data,
+    scanned by `workers` processes in parallel.
+    """
+    if workers < 1 or batch_size < 1 or prefetch < 1:
+        raise ValueError("workers, batch_size and prefetch must be positive")
+    ranges = seed.user_id_ranges(workers)
+    if ordered:
+        queues = [mp.Queue(prefetch) for _ in ranges]
+    else:
+        shared = mp.Queue(prefetch * workers)
+        queues = [shared] * len(ranges)
+    procs = [
+        mp.Process(
+            target=_scan_range, args=(i, r, batch_size, queues[i]), daemon=True
+        )
+        for i, r in enumerate(ranges)
+    ]
+    for p in procs:
+        p.start()
+    try:
+        if ordered:
+            for q in queues:
+                while True:
+                    batch = _check(*q.get())
+                    if batch is None:
+                        break
+                    yield batch
+        else:
+            remaining = len(procs)
+            while remaining:
+                batch = _check(*shared.get())
+                if batch is None:
+                    remaining -= 1
+                    continue
+                yield batch
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join()
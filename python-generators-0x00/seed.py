@@ -8,11 +8,23 @@ Functions:
 - connect_to_prodev() -> connects specifically to the ALX_prodev database
 - create_table(connection) -> creates user_data table if it doesn't exist
 - insert_data(connection, csv_path) -> loads rows from CSV into user_data
+  in committed chunks, optionally across several worker connections,
+  or via LOAD DATA LOCAL INFILE with method="load_data"
+- ConnectionPool / get_pool() -> reusable ALX_prodev connections for readers
+- stream_rows(connection, query) -> unbuffered, bounded read-ahead row chunks
+- user_id_ranges(n) / key_range_clause(r) -> primary-key range partitioning
 """
 
 import os
 import csv
-from typing import Optional, Tuple
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import (
+    Any, Deque, Dict, Generator, Iterator, List, Optional, Sequence, Tuple
+)
 
 try:
     import mysql.connector  # type: ignore
@@ -24,16 +36,20 @@ except Exception as e:  # pragma: no cover
         f"Original error: {e}"
     )
 
+from decoders import RowDecoder
+
 
 # --- Basic connection settings (override via env if needed) ---
 MYSQL_HOST = os.environ.get("MYSQL_HOST", "localhost")
 MYSQL_USER = os.environ.get("MYSQL_USER", "root")
 MYSQL_PASSWORD = os.environ.get("MYSQL_PASSWORD", "")
 DB_NAME = "ALX_prodev"
+POOL_SIZE = int(os.environ.get("MYSQL_POOL_SIZE", "5"))
+STREAM_READ_AHEAD = int(os.environ.get("MYSQL_STREAM_READ_AHEAD", "1000"))
 
 
 def _connect(
-    db: Optional[str] = None
+    db: Optional[str] = None, **options: Any
 ) -> Tuple[Optional[MySQLConnection], Optional[Exception]]:
     """Internal helper to create a MySQL connection."""
     try:
@@ -43,6 +59,7 @@ def _connect(
             password=MYSQL_PASSWORD,
             database=db if db else None,
             autocommit=False,
+            **options,
         )
         return conn, None
     except Exception as err:
@@ -91,14 +108,15 @@ def create_table(connection: MySQLConnection) -> None:
     print("Table user_data created successfully")
 
 
-def insert_data(connection: MySQLConnection, csv_path: str) -> None:
-    """
-    Insert rows from CSV into user_data.
+UserRow = Tuple[str, str, str, str]
+INSERT_CHUNK_SIZE = int(os.environ.get("SEED_CHUNK_SIZE", "1000"))
 
-    Expected CSV headers: user_id,name,email,age
-    If a row with the same user_id exists, it will be updated.
-    """
-    rows = []
+
+def _iter_csv_chunks(
+    csv_path: str, chunk_size: int
+) -> Generator[List[UserRow], None, None]:
+    """Read the CSV lazily, yielding lists of at most chunk_size valid rows."""
+    chunk: List[UserRow] = []
     with open(csv_path, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for r in reader:
@@ -108,18 +126,523 @@ def insert_data(connection: MySQLConnection, csv_path: str) -> None:
             # store age as numeric; if integer in CSV, it still fits DECIMAL
             age = r.get("age")
             if uid and name and email and age is not None:
-                rows.append((uid, name, email, age))
+                chunk.append((uid, name, email, age))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+    if chunk:
+        yield chunk
 
-    if not rows:
-        return
 
+def _insert_chunk(connection: MySQLConnection, rows: List[UserRow]) -> None:
+    """Upsert rows with one multi-row INSERT and commit them."""
+    placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
     sql = (
         "INSERT INTO user_data (user_id, name, email, age) "
-        "VALUES (%s, %s, %s, %s) "
+        f"VALUES {placeholders} "
         "ON DUPLICATE KEY UPDATE "
         "name=VALUES(name), email=VALUES(email), age=VALUES(age);"
     )
+    params = [value for row in rows for value in row]
+    try:
+        with connection.cursor() as cur:
+            cur.execute(sql, params)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
 
-    with connection.cursor() as cur:
-        cur.executemany(sql, rows)
-    connection.commit()
+
+def _load_parallel(csv_path: str, chunk_size: int, workers: int) -> int:
+    """
+    Feed CSV chunks through a bounded queue to worker threads, each with
+    its own ALX_prodev connection. Returns the number of rows loaded.
+    """
+    chunks: "queue.Queue[Optional[List[UserRow]]]" = queue.Queue(workers * 2)
+    errors: List[Exception] = []
+    loaded = [0] * workers
+
+    def worker(index: int) -> None:
+        conn = connect_to_prodev()
+        if conn is None:
+            errors.append(ConnectionError(f"worker {index} could not connect"))
+        try:
+            while True:
+                rows = chunks.get()
+                if rows is None:
+                    return
+                if errors:
+                    continue  # keep draining so the reader never blocks
+                try:
+                    _insert_chunk(conn, rows)
+                    loaded[index] += len(rows)
+                except Exception as err:
+                    errors.append(err)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(i,), daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for chunk in _iter_csv_chunks(csv_path, chunk_size):
+            if errors:
+                break
+            chunks.put(chunk)
+    finally:
+        for _ in threads:
+            chunks.put(None)
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+    return sum(loaded)
+
+
+# Errors meaning LOAD DATA LOCAL is disabled on the client or the server
+LOCAL_INFILE_ERRNOS = (
+    1148,  # ER_NOT_ALLOWED_COMMAND (older servers)
+    2068,  # CR_LOAD_DATA_LOCAL_INFILE_REJECTED
+    3948,  # ER_CLIENT_LOCAL_FILES_DISABLED
+)
+
+# Staged rows that fit user_data (CHAR(36) id, DECIMAL(10,2) age)
+STAGING_VALID_ROW = (
+    "CHAR_LENGTH(TRIM(user_id)) BETWEEN 1 AND 36 "
+    "AND TRIM(name) <> '' AND TRIM(email) <> '' "
+    "AND TRIM(age) REGEXP '^[0-9]{1,8}([.][0-9]{1,2})?$'"
+)
+
+
+def _csv_layout(csv_path: str) -> Tuple[List[str], str]:
+    """Return the CSV header fields and its line terminator."""
+    with open(csv_path, "rb") as f:
+        first = f.readline()
+    # escaped for the SQL string literal, not Python
+    terminator = "\\r\\n" if first.endswith(b"\r\n") else "\\n"
+    header = next(csv.reader([first.decode("utf-8-sig")]), [])
+    return [h.strip() for h in header], terminator
+
+
+def _load_data_infile(csv_path: str) -> Dict[str, float]:
+    """
+    Bulk load via LOAD DATA LOCAL INFILE into a temporary staging table,
+    then validate, coerce and merge into user_data with one upsert.
+    Raises the driver error if local_infile is disabled.
+    """
+    header, terminator = _csv_layout(csv_path)
+    wanted = ("user_id", "name", "email", "age")
+    # columns the staging table does not know are read into a throwaway var
+    targets = ", ".join(h if h in wanted else "@skip" for h in header)
+    start = time.perf_counter()
+    conn, err = _connect(DB_NAME, allow_local_infile=True)
+    if err:
+        raise err
+    try:
+        with conn.cursor(buffered=True) as cur:
+            cur.execute(
+                """
+                CREATE TEMPORARY TABLE user_data_staging (
+                    user_id VARCHAR(255),
+                    name VARCHAR(255),
+                    email VARCHAR(255),
+                    age VARCHAR(64)
+                );
+                """
+            )
+            cur.execute(
+                "LOAD DATA LOCAL INFILE %s INTO TABLE user_data_staging "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                f"LINES TERMINATED BY '{terminator}' "
+                f"IGNORE 1 LINES ({targets});",
+                (os.path.abspath(csv_path),),
+            )
+            cur.execute("SELECT COUNT(*) FROM user_data_staging;")
+            (staged,) = cur.fetchone()
+            cur.execute(
+                "INSERT INTO user_data (user_id, name, email, age) "
+                "SELECT TRIM(user_id), TRIM(name), TRIM(email), "
+                "CAST(TRIM(age) AS DECIMAL(10,2)) "
+                f"FROM user_data_staging WHERE {STAGING_VALID_ROW} "
+                "ON DUPLICATE KEY UPDATE "
+                "name=VALUES(name), email=VALUES(email), age=VALUES(age);"
+            )
+            cur.execute(
+                "SELECT COUNT(*) FROM user_data_staging "
+                f"WHERE {STAGING_VALID_ROW};"
+            )
+            (valid,) = cur.fetchone()
+            cur.execute("DROP TEMPORARY TABLE user_data_staging;")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": valid,
+        "rejected": staged - valid,
+        "seconds": elapsed,
+        "rows_per_sec": valid / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def insert_data(
+    connection: MySQLConnection,
+    csv_path: str,
+    chunk_size: int = INSERT_CHUNK_SIZE,
+    workers: int = 1,
+    method: str = "insert",
+) -> Dict[str, float]:
+    """
+    Insert rows from CSV into user_data.
+
+    Expected CSV headers: user_id,name,email,age
+    If a row with the same user_id exists, it will be updated.
+
+    method="insert" (default) streams the CSV in chunks of chunk_size
+    rows; each chunk is sent as one multi-row INSERT and committed on its
+    own, so memory and lock time stay bounded. With workers > 1 the chunks
+    are spread over that many extra connections (connection is then
+    unused). Chunks committed before a failure stay committed.
+
+    method="load_data" uses LOAD DATA LOCAL INFILE into a staging table and
+    one merge upsert (rows that fail validation are counted as "rejected").
+    It falls back to method="insert" when local_infile is disabled.
+
+    Returns {"rows", "seconds", "rows_per_sec"}.
+    """
+    if method not in ("insert", "load_data"):
+        raise ValueError(f"unknown insert method: {method!r}")
+    if chunk_size < 1 or workers < 1:
+        raise ValueError("chunk_size and workers must be at least 1")
+    if method == "load_data":
+        try:
+            return _load_data_infile(csv_path)
+        except mysql.connector.Error as err:
+            if getattr(err, "errno", None) not in LOCAL_INFILE_ERRNOS:
+                raise
+            print(f"LOAD DATA LOCAL unavailable ({err}); using INSERT path")
+    start = time.perf_counter()
+    if workers == 1:
+        total = 0
+        for chunk in _iter_csv_chunks(csv_path, chunk_size):
+            _insert_chunk(connection, chunk)
+            total += len(chunk)
+    else:
+        total = _load_parallel(csv_path, chunk_size, workers)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": total,
+        "seconds": elapsed,
+        "rows_per_sec": total / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+# --- Connection pool ---
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free within the timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of connections to one database.
+
+    - max_size: upper bound on open connections (idle + checked out)
+    - idle_timeout: idle connections older than this (seconds) are closed
+    - checkout_timeout: default seconds acquire() waits for a free slot
+    - health_check_interval: idle connections unused for longer than this
+      are pinged before being handed out; dead ones are discarded
+
+    Counters (see stats()): hits (idle connection reused), misses (new
+    connection opened), waits / wait_time (blocked on a full pool),
+    timeouts, evicted (idle expiry) and discarded (failed health check
+    or reset).
+    """
+
+    def __init__(
+        self,
+        db: Optional[str] = DB_NAME,
+        max_size: int = POOL_SIZE,
+        idle_timeout: float = 300.0,
+        checkout_timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.db = db
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._idle: Deque[Tuple[MySQLConnection, float]] = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "evicted": 0,
+            "discarded": 0,
+        }
+
+    def _open(self) -> MySQLConnection:
+        # consume_results lets a half-read cursor be closed cleanly
+        conn, err = _connect(self.db, consume_results=True)
+        if err:
+            raise err
+        return conn
+
+    @staticmethod
+    def _close_quietly(conn: MySQLConnection) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict_expired(self, now: float) -> List[MySQLConnection]:
+        """Pop idle connections past idle_timeout (caller holds the lock)."""
+        expired = []
+        # oldest connections sit at the left end
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+            self._stats["evicted"] += 1
+        return expired
+
+    def acquire(self, timeout: Optional[float] = None) -> MySQLConnection:
+        """Check a connection out, opening one if the pool has room."""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited_since = None
+        while True:
+            to_close = []
+            conn, last_used, create = None, 0.0, False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+                now = time.monotonic()
+                to_close = self._evict_expired(now)
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    remaining = deadline - now
+                    if waited_since is None:
+                        waited_since = now
+                        self._stats["waits"] += 1
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        self._stats["wait_time"] += time.monotonic() - waited_since
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"no connection available within {timeout:.1f}s"
+                        )
+                if waited_since is not None and (conn is not None or create):
+                    self._stats["wait_time"] += time.monotonic() - waited_since
+            for stale in to_close:
+                self._close_quietly(stale)
+
+            if create:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["misses"] += 1
+                return conn
+
+            if conn is None:
+                continue
+            if time.monotonic() - last_used > self.health_check_interval:
+                if not self._is_healthy(conn):
+                    self._discard(conn)
+                    continue
+            with self._cond:
+                self._stats["hits"] += 1
+            return conn
+
+    @staticmethod
+    def _is_healthy(conn: MySQLConnection) -> bool:
+        try:
+            return bool(conn.is_connected())
+        except Exception:
+            return False
+
+    def _discard(self, conn: MySQLConnection) -> None:
+        self._close_quietly(conn)
+        self._forget(conn)
+
+    def discard(self, conn: MySQLConnection) -> None:
+        """
+        Drop a checked-out connection instead of returning it.
+
+        The socket is shut down without draining pending rows, so an
+        abandoned unbuffered stream does not have to be read to the end.
+        """
+        shutdown = getattr(conn, "shutdown", None)
+        if shutdown is not None:
+            try:
+                shutdown()
+            except Exception:
+                pass
+        else:
+            self._close_quietly(conn)
+        self._forget(conn)
+
+    def _forget(self, conn: MySQLConnection) -> None:
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    def release(self, conn: MySQLConnection) -> None:
+        """Return a connection; it is rolled back so no snapshot lingers."""
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                conn_to_close = conn
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn_to_close = None
+            self._cond.notify()
+        if conn_to_close is not None:
+            self._close_quietly(conn_to_close)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[MySQLConnection]:
+        """
+        Context manager: acquire on enter, release on exit.
+        If the body raises (including a generator being closed early) the
+        connection is discarded, since it may still have rows in flight.
+        """
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except BaseException:
+            self.discard(conn)
+            raise
+        self.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the pool counters plus current size and idle count."""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["size"] = self._size
+            snapshot["idle"] = len(self._idle)
+        return snapshot
+
+    def close(self) -> None:
+        """Close idle connections; checked-out ones close on release."""
+        with self._cond:
+            self._closed = True
+            idle = [c for c, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide ALX_prodev pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_NAME)
+    return _pool
+
+
+# --- Streaming ---
+
+def stream_rows(
+    connection: MySQLConnection,
+    query: str,
+    params: Optional[Sequence[Any]] = None,
+    read_ahead: int = STREAM_READ_AHEAD,
+    shape: Optional[str] = None,
+) -> Generator[List[Any], None, None]:
+    """
+    Run query on an explicitly unbuffered cursor and yield rows in chunks.
+
+    Rows are pulled off the socket with fetchmany(read_ahead), so at most
+    read_ahead rows are held client-side at once whatever the table size.
+    shape=None yields raw tuples; "dict", "tuple" or "record" decodes each
+    chunk with a decoders.RowDecoder built from the cursor description.
+    If the consumer stops early the cursor is left unclosed, because
+    closing it would drain the rest of the result; use a pooled connection
+    (ConnectionPool.connection discards it) or drop the connection.
+    """
+    if read_ahead < 1:
+        raise ValueError("read_ahead must be at least 1")
+    cursor = connection.cursor(buffered=False)
+    cursor.execute(query, params or ())
+    decode = None
+    if shape is not None:
+        decode = RowDecoder.from_description(cursor.description, shape).decode
+    while True:
+        rows = cursor.fetchmany(read_ahead)
+        if not rows:
+            break
+        yield rows if decode is None else list(map(decode, rows))
+    cursor.close()
+
+
+# --- Key ranges ---
+
+KeyRange = Tuple[Optional[str], Optional[str]]
+
+
+def user_id_ranges(partitions: int) -> List[KeyRange]:
+    """
+    Split the user_id key space into contiguous [low, high) ranges.
+
+    Boundaries are evenly spaced 4-hex-digit prefixes, which balances well
+    for UUID keys; the first and last ranges are open-ended so every key
+    falls into exactly one range whatever its format.
+    """
+    if not 1 <= partitions <= 0x10000:
+        raise ValueError("partitions must be between 1 and 65536")
+    bounds: List[Optional[str]] = [
+        format(i * 0x10000 // partitions, "04x") for i in range(1, partitions)
+    ]
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def key_range_clause(
+    key_range: KeyRange, column: str = "user_id"
+) -> Tuple[str, List[str]]:
+    """Return a WHERE fragment (or "1=1") and its params for a key range."""
+    low, high = key_range
+    parts, params = [], []
+    if low is not None:
+        parts.append(f"{column} >= %s")
+        params.append(low)
+    if high is not None:
+        parts.append(f"{column} < %s")
+        params.append(high)
+    return (" AND ".join(parts) or "1=1"), params